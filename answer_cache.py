@@ -0,0 +1,177 @@
+"""Cache jawaban di depan search.process_query.
+
+Pertanyaan yang sama persis (setelah dinormalisasi) langsung kena cache.
+Pertanyaan yang embedding-nya cukup mirip (cosine >= threshold) juga
+dianggap hit, asalkan referensi ayat yang disebut sama, sehingga
+"Al-Baqarah 255" tidak pernah dijawab dengan jawaban "Al-Baqarah 256".
+Entry kedaluwarsa setelah TTL dan dibuang LRU jika melewati batas memori.
+Seluruh cache dikosongkan saat content_version di node Quran berubah
+(di-set oleh insert_data.py setiap kali ada Surah/Ayat yang berubah).
+"""
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Tuple
+import numpy as np
+from config import (
+    ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_BYTES, ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_VERSION_CHECK
+)
+
+class CacheEntry(NamedTuple):
+    query: str  # Pertanyaan yang sudah dinormalisasi
+    scope: Tuple  # Referensi ayat dalam pertanyaan; hit semantik harus sama persis
+    answer: str
+    vector: Optional[np.ndarray]
+    created: float
+    size: int
+
+def normalize_query(query_text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s:]", " ", query_text.lower()).split())
+
+def cache_key(query_text: str, scope: Tuple = ()) -> Tuple[str, Tuple]:
+    # Normalisasi membuang "-" dan ",", jadi "1-5" dan "1, 5" hanya dibedakan oleh scope
+    return normalize_query(query_text), tuple(scope)
+
+class AnswerCache:
+    def __init__(self, ttl=ANSWER_CACHE_TTL, max_bytes=ANSWER_CACHE_MAX_BYTES,
+                 similarity_threshold=ANSWER_CACHE_SIMILARITY,
+                 version_fn: Optional[Callable[[], object]] = None,
+                 version_check_interval=ANSWER_CACHE_VERSION_CHECK):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.similarity_threshold = similarity_threshold
+        self.version_fn = version_fn
+        self.version_check_interval = version_check_interval
+        self._entries: "OrderedDict[Tuple[str, Tuple], CacheEntry]" = OrderedDict()  # Urutan = LRU (terlama di depan)
+        self._bytes = 0
+        self._version = None
+        self._version_checked = 0.0
+        self._matrix = None  # (keys, matriks vektor) untuk pencarian semantik, dibangun ulang jika kotor
+        self._lock = threading.Lock()
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query_text: str, scope: Tuple = (),
+            vector_fn: Optional[Callable[[], np.ndarray]] = None) -> Optional[str]:
+        """Jawaban tersimpan atau None.
+
+        `vector_fn` hanya dipanggil jika tidak ada hit persis, sehingga hit
+        persis tidak membayar biaya embedding.
+        """
+        key = cache_key(query_text, scope)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry and self._alive(entry):
+                self._entries.move_to_end(key)
+                self.hits["exact"] += 1
+                return entry.answer
+            if entry:
+                self._remove(key)
+
+        if vector_fn is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return self.get_similar(vector_fn(), scope)
+
+    def get_similar(self, vector: np.ndarray, scope: Tuple = ()) -> Optional[str]:
+        """Hit semantik saja, untuk pemanggil yang baru punya vektor setelah cek persis"""
+        vector = _unit(vector)
+        with self._lock:
+            match = self._nearest(vector, tuple(scope))
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits["semantic"] += 1
+            return self._entries[match].answer
+
+    def put(self, query_text: str, answer: str, scope: Tuple = (), vector: Optional[np.ndarray] = None):
+        key = cache_key(query_text, scope)
+        vector = _unit(vector) if vector is not None else None
+        size = sys.getsizeof(key[0]) + sys.getsizeof(answer) + (vector.nbytes if vector is not None else 0)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version()
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(key[0], key[1], answer, vector, time.monotonic(), size)
+            self._bytes += size
+            self._matrix = None
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+
+    def _alive(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.created < self.ttl
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self._matrix = None
+
+    def _evict(self):
+        # Buang yang kedaluwarsa dulu, lalu LRU sampai di bawah batas memori
+        for key in [key for key, entry in self._entries.items() if not self._alive(entry)]:
+            self._remove(key)
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _nearest(self, vector: np.ndarray, scope: Tuple) -> Optional[Tuple[str, Tuple]]:
+        if self._matrix is None:
+            keys = [key for key, entry in self._entries.items() if entry.vector is not None]
+            vectors = np.stack([self._entries[key].vector for key in keys]) if keys else None
+            self._matrix = (keys, vectors)
+        keys, vectors = self._matrix
+        if vectors is None or vectors.shape[1] != vector.shape[0]:
+            return None
+
+        similarities = vectors @ vector
+        for position in np.argsort(-similarities):
+            if similarities[position] < self.similarity_threshold:
+                break
+            entry = self._entries[keys[position]]
+            if entry.scope == scope and self._alive(entry):
+                return keys[position]
+        return None
+
+    def _check_version(self):
+        if self.version_fn is None or time.monotonic() - self._version_checked < self.version_check_interval:
+            return
+        self._version_checked = time.monotonic()
+        try:
+            version = self.version_fn()
+        except Exception as e:
+            print(f"⚠️ Gagal membaca content_version: {str(e)}")
+            return
+        if version != self._version:
+            if self._version is not None:
+                print(f"🧹 Data ayat berubah (versi {version}), cache jawaban dikosongkan")
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+            self._version = version
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+@lru_cache(maxsize=None)
+def get_answer_cache() -> AnswerCache:
+    """Cache jawaban milik proses; versi data dibaca dari node Quran di Neo4j"""
+    from config import driver
+    from graph_writer import load_content_version
+    return AnswerCache(version_fn=lambda: load_content_version(driver))
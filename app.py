@@ -1,8 +1,6 @@
 import streamlit as st
-from search import initialize_groq, process_query
-from neo4j_graphrag.retrievers import VectorRetriever
-from groq_embedder import Embedder
-from config import driver, INDEX_NAME
+from search import initialize_groq, process_query_stream
+from resources import get_resources
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -15,17 +13,16 @@ st.set_page_config(
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+@st.cache_resource
+def load_resources():
+    """Driver, embedder, klien LLM dan VerseStore dibuat sekali per proses, bukan per rerun"""
+    return get_resources()
+
 def initialize_chat():
     """Inisialisasi komponen utama"""
+    resources = load_resources()
     GROQ_API_KEY, GROQ_MODEL = initialize_groq()
-    
-    retriever = VectorRetriever(
-        driver=driver,
-        index_name=INDEX_NAME,
-        embedder=Embedder
-    )
-    
-    return GROQ_API_KEY, GROQ_MODEL, retriever
+    return GROQ_API_KEY, GROQ_MODEL, resources.retriever
 
 # Header aplikasi
 st.title("📖 Chatbot Al-Quran")
@@ -108,60 +105,59 @@ try:
         with st.chat_message("user", avatar="💭"):
             st.markdown(f'<div class="user-message">{prompt}</div>', unsafe_allow_html=True)
 
-        # Proses pertanyaan
-        with st.spinner("🔍 Mencari jawaban..."):
-            try:
-                answer = process_query(
-                    prompt, 
-                    retriever,
-                    GROQ_API_KEY,
-                    GROQ_MODEL
-                )
-                
-                # Validasi jawaban error
-                if answer.startswith("❌"):
-                    error_msg = answer.replace("❌", "").strip()
-                    with st.chat_message("assistant", avatar="❌"):
-                        st.markdown(f'<div class="error-message">{error_msg}</div>', unsafe_allow_html=True)
-                    
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": answer,
-                        "avatar": "❌"
-                    })
-                    st.stop()
-                
-                # Formatting jawaban
-                processed_answer = answer.replace('\n', '<br>')
-                formatted_answer = f'<div class="assistant-message">{processed_answer}</div>'
-
-                # Tampilkan jawaban
-                with st.chat_message("assistant", avatar="💡"):
-                    st.markdown(formatted_answer, unsafe_allow_html=True)
-                
-                # Simpan ke riwayat
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": answer,
-                    "avatar": "💡"
-                })
-                
-            except Exception as e:
-                error_msg = f"❌ Terjadi kesalahan sistem: {str(e)}"
+        # Proses pertanyaan: spinner hanya sampai potongan jawaban pertama tiba
+        try:
+            stream = process_query_stream(
+                prompt, 
+                retriever,
+                GROQ_API_KEY,
+                GROQ_MODEL
+            )
+            with st.spinner("🔍 Mencari jawaban..."):
+                answer = next(stream, "")
+            
+            # Validasi jawaban error
+            if answer.startswith("❌"):
+                error_msg = answer.replace("❌", "").strip()
                 with st.chat_message("assistant", avatar="❌"):
                     st.markdown(f'<div class="error-message">{error_msg}</div>', unsafe_allow_html=True)
                 
                 st.session_state.messages.append({
                     "role": "assistant",
-                    "content": error_msg,
+                    "content": answer,
                     "avatar": "❌"
                 })
+                st.stop()
+            
+            # Tampilkan jawaban secara bertahap
+            with st.chat_message("assistant", avatar="💡"):
+                placeholder = st.empty()
+                for chunk in stream:
+                    answer += chunk
+                    processed_answer = answer.replace('\n', '<br>')
+                    placeholder.markdown(f'<div class="assistant-message">{processed_answer}▌</div>', unsafe_allow_html=True)
+                
+                # Formatting jawaban
+                processed_answer = answer.replace('\n', '<br>')
+                placeholder.markdown(f'<div class="assistant-message">{processed_answer}</div>', unsafe_allow_html=True)
+            
+            # Simpan ke riwayat
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": answer,
+                "avatar": "💡"
+            })
+            
+        except Exception as e:
+            error_msg = f"❌ Terjadi kesalahan sistem: {str(e)}"
+            with st.chat_message("assistant", avatar="❌"):
+                st.markdown(f'<div class="error-message">{error_msg}</div>', unsafe_allow_html=True)
+            
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": error_msg,
+                "avatar": "❌"
+            })
 
 except Exception as main_error:
     st.error(f"❌ Terjadi kesalahan sistem utama: {str(main_error)}")
-
-finally:
-    try:
-        driver.close()
-    except:
-        pass
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Normalisasi teks Arab untuk pencarian potongan ayat.
+
+Teks ayat di korpus berharakat lengkap (rasm utsmani), sedangkan pengguna
+biasanya menempelkan potongan dengan atau tanpa harakat dan dengan ejaan
+alef/ya/ta marbutah yang berbeda. Kedua sisi dinormalisasi dengan fungsi
+yang sama sebelum dibandingkan.
+"""
+import re
+from typing import Set
+
+# Harakat, tanda tajwid/waqaf utsmani, alef kecil (U+0670), tatweel (U+0640),
+# dan huruf AE (U+06D5) yang di korpus dipakai sebagai tanda lepas, bukan huruf
+DIACRITICS_PATTERN = re.compile("[ؐ-ًؚ-ٰٟە-ۭ࣓-ࣿـ]")
+LETTER_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",  # أ إ آ ٱ -> ا
+    "ى": "ي", "ی": "ي", "ئ": "ي",  # ى ی ئ -> ي
+    "ؤ": "و",  # ؤ -> و
+    "ة": "ه",  # ة -> ه
+    "ک": "ك",  # ک -> ك
+})
+NON_ARABIC_PATTERN = re.compile("[^ء-ي\\s]")
+ARABIC_LETTER_PATTERN = re.compile("[ء-ي]")
+
+def normalize_arabic(text: str) -> str:
+    """Tanpa harakat dan tatweel, bentuk alef/ya/ta marbutah diseragamkan"""
+    text = DIACRITICS_PATTERN.sub("", text or "")
+    text = text.translate(LETTER_MAP)
+    text = NON_ARABIC_PATTERN.sub(" ", text)
+    return " ".join(text.split())
+
+def arabic_skeleton(text: str) -> str:
+    """Bentuk pencocokan yang lebih longgar: alef dan hamza lepas dibuang.
+
+    Rasm utsmani sering menulis alef panjang sebagai alef kecil (الْكِتٰبُ),
+    sedangkan ejaan biasa memakai alef penuh (الكتاب); keduanya menjadi "لكتب".
+    """
+    return normalize_arabic(text).replace("ا", "").replace("ء", "")
+
+def is_arabic(text: str, min_letters: int = 3, min_ratio: float = 0.5) -> bool:
+    """True jika teks didominasi huruf Arab (potongan ayat, bukan pertanyaan yang menyebut satu kata)"""
+    arabic_letters = len(ARABIC_LETTER_PATTERN.findall(text or ""))
+    all_letters = sum(1 for char in text or "" if char.isalpha())
+    return arabic_letters >= min_letters and arabic_letters >= min_ratio * all_letters
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
@@ -0,0 +1,216 @@
+"""Menjalankan banyak pertanyaan sekaligus (evaluasi, prekomputasi jawaban).
+
+Berbeda dengan search.process_query yang memproses satu pertanyaan per
+panggilan, di sini:
+- semua pertanyaan di-embed dalam satu panggilan Embedder.embed_batch,
+- vector search (beserta ekspansi RELATED_TO) dan full-text search untuk
+  banyak pertanyaan dikirim dalam satu query UNWIND per chunk,
+- panggilan LLM berjalan bersamaan dengan batas konkurensi.
+Hasil dikembalikan sesuai urutan input; kegagalan dicatat per item.
+
+    python batch_query.py questions.txt -o answers.jsonl --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from tqdm import tqdm
+from config import (
+    driver, INDEX_NAME, RETRIEVAL_CANDIDATES, RETRIEVAL_TOP_HITS, RETRIEVAL_NEIGHBORS,
+    RETRIEVAL_NEIGHBOR_WEIGHT, RETRIEVAL_LIMIT, FULLTEXT_INDEX_NAME, FRAGMENT_MATCH_LIMIT,
+    BATCH_QUERY_CHUNK, BATCH_LLM_CONCURRENCY
+)
+from groq_embedder import Embedder
+from llm_client import LLMClient, content_of
+from arabic_text import is_arabic
+from answer_cache import get_answer_cache
+from resources import DEFAULT_GROQ_MODEL
+from verse_store import get_verse_store
+from search import (
+    GRAPH_RETRIEVAL_QUERY, LEXICAL_QUERY, escape_lucene, reciprocal_rank_fusion, parse_verse_query,
+    build_context, generate_prompt, format_fragment_answer
+)
+
+# Query retrieval tunggal dijalankan per baris UNWIND sebagai subquery
+BATCH_VECTOR_QUERY = """
+UNWIND $queries AS q
+CALL {
+    WITH q
+""" + GRAPH_RETRIEVAL_QUERY.replace("$query_vector", "q.vector") + """
+}
+RETURN q.index AS query_index, text, arabic, translation, tafsir, surah, surah_number,
+       ayat_number, score, is_hit, related_to
+"""
+
+BATCH_LEXICAL_QUERY = """
+UNWIND $queries AS q
+CALL {
+    WITH q
+""" + LEXICAL_QUERY.replace("$query", "q.text") + """
+    LIMIT $limit
+}
+RETURN q.index AS query_index, text, arabic, translation, tafsir, surah, surah_number, ayat_number, score
+"""
+
+def run_unwind(query: str, rows: List[Dict], **params) -> Dict[int, List[Dict]]:
+    """Jalankan query UNWIND; record dikelompokkan per indeks pertanyaan"""
+    grouped: Dict[int, List[Dict]] = {}
+    if not rows:
+        return grouped
+    records, _, _ = driver.execute_query(query, queries=rows, **params)
+    for record in records:
+        data = record.data()
+        grouped.setdefault(data.pop("query_index"), []).append(data)
+    return grouped
+
+def batch_retrieve(items: List[Dict], chunk_size: int = BATCH_QUERY_CHUNK):
+    """Isi `source` dan `records` setiap item (atau `error`), dengan sesedikit mungkin round trip"""
+    verse_store = get_verse_store()
+    hybrid = []
+    for item in items:
+        query_text = item["query"]
+        if is_arabic(query_text):
+            records = verse_store.find_fragment(query_text, limit=FRAGMENT_MATCH_LIMIT)
+            if records:
+                item.update(source="fragment", records=records)
+                continue
+        refs = parse_verse_query(query_text)
+        records = verse_store.get_many(refs) if refs else []
+        if records:
+            item.update(source="specific", records=records)
+            continue
+        hybrid.append(item)
+
+    if not hybrid:
+        return
+    # Satu panggilan model untuk semua pertanyaan (duplikat dan cache ditangani embed_batch)
+    vectors = Embedder.embed_batch([item["query"] for item in hybrid])
+    for item, vector in zip(hybrid, vectors):
+        item["vector"] = vector
+
+    for start in tqdm(range(0, len(hybrid), chunk_size), desc="Retrieval batch"):
+        chunk = hybrid[start:start + chunk_size]
+        try:
+            vector_hits = run_unwind(
+                BATCH_VECTOR_QUERY,
+                [{"index": item["index"], "vector": item["vector"].tolist()} for item in chunk],
+                index_name=INDEX_NAME,
+                candidates=RETRIEVAL_CANDIDATES,
+                top_hits=RETRIEVAL_TOP_HITS,
+                neighbors=RETRIEVAL_NEIGHBORS,
+                neighbor_weight=RETRIEVAL_NEIGHBOR_WEIGHT,
+                limit=RETRIEVAL_LIMIT
+            )
+            lexical_rows = [
+                {"index": item["index"], "text": escape_lucene(item["query"])}
+                for item in chunk if escape_lucene(item["query"])
+            ]
+            lexical_hits = run_unwind(BATCH_LEXICAL_QUERY, lexical_rows,
+                                      index_name=FULLTEXT_INDEX_NAME, limit=RETRIEVAL_LIMIT)
+        except Exception as e:
+            for item in chunk:
+                item["error"] = f"Retrieval gagal: {str(e)}"
+            continue
+        for item in chunk:
+            item.update(source="hybrid", records=reciprocal_rank_fusion(
+                vector_hits.get(item["index"], []), lexical_hits.get(item["index"], [])
+            ))
+
+async def batch_answer(items: List[Dict], llm: LLMClient, model: str, concurrency: int):
+    """Panggil LLM untuk setiap item yang siap, maksimal `concurrency` request bersamaan"""
+    answer_cache = get_answer_cache()
+    slots = asyncio.Semaphore(concurrency)
+    progress_bar = tqdm(total=len(items), desc="Jawaban LLM")
+
+    async def answer_one(item):
+        try:
+            if "error" in item:
+                return
+            if item["source"] == "fragment":
+                item["answer"] = format_fragment_answer(item["records"])
+                return
+            if not item["records"]:
+                item["answer"] = "⚠️ Maaf, tidak menemukan data yang relevan."
+                return
+            scope = tuple(parse_verse_query(item["query"]))
+            vector = item.get("vector")
+            cached = answer_cache.get(item["query"], scope, vector_fn=(lambda: vector) if vector is not None else None)
+            if cached:
+                item.update(answer=cached, cached=True)
+                return
+
+            is_specific = item["source"] == "specific"
+            context = build_context(item["records"], is_specific=is_specific, query_text=item["query"])
+            prompt = generate_prompt(context, item["query"], is_specific)
+            async with slots:
+                response_data = await llm.achat(prompt, model)
+            item["answer"] = content_of(response_data)
+            answer_cache.put(item["query"], item["answer"], scope, vector=vector)
+        except Exception as e:
+            item["error"] = f"LLM gagal: {str(e)}"
+        finally:
+            progress_bar.update(1)
+
+    try:
+        await asyncio.gather(*(answer_one(item) for item in items))
+    finally:
+        progress_bar.close()
+        await llm.aclose()
+
+def run_batch(queries: List[str], answer: bool = True, llm: Optional[LLMClient] = None,
+              model: str = DEFAULT_GROQ_MODEL, concurrency: int = BATCH_LLM_CONCURRENCY) -> List[Dict]:
+    """Proses banyak pertanyaan; satu dict per pertanyaan sesuai urutan input.
+
+    Setiap hasil berisi index, query, source, records, answer (jika `answer=True`)
+    dan error (None jika berhasil).
+    """
+    items = [{"index": index, "query": query} for index, query in enumerate(queries)]
+    batch_retrieve(items)
+    if answer:
+        asyncio.run(batch_answer(items, llm or LLMClient(api_key=os.getenv("GROQ_API_KEY")), model, concurrency))
+    return [
+        {
+            "index": item["index"],
+            "query": item["query"],
+            "source": item.get("source"),
+            "records": item.get("records", []),
+            "answer": item.get("answer"),
+            "cached": item.get("cached", False),
+            "error": item.get("error")
+        }
+        for item in items
+    ]
+
+def read_queries(path: str) -> List[str]:
+    """Satu pertanyaan per baris, atau JSONL dengan field "query" """
+    queries = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            queries.append(json.loads(line)["query"] if line.startswith("{") else line)
+    return queries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jalankan banyak pertanyaan tafsir sekaligus")
+    parser.add_argument("input", help="File pertanyaan (teks per baris atau JSONL dengan field query)")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl")
+    parser.add_argument("--retrieve-only", action="store_true", help="Hanya retrieval, tanpa memanggil LLM")
+    parser.add_argument("--concurrency", type=int, default=BATCH_LLM_CONCURRENCY)
+    parser.add_argument("--model", default=DEFAULT_GROQ_MODEL)
+    args = parser.parse_args()
+
+    queries = read_queries(args.input)
+    started = time.perf_counter()
+    results = run_batch(queries, answer=not args.retrieve_only, model=args.model, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        for result in results:
+            file.write(json.dumps(result, ensure_ascii=False) + "\n")
+    failed = sum(1 for result in results if result["error"])
+    print(f"✅ {len(results)} pertanyaan diproses dalam {elapsed:.1f} detik ({failed} gagal) -> {args.output}")
+    driver.close()
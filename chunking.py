@@ -1,6 +1,7 @@
 # chunking.py
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
+from corpus import iter_surahs
 
 class QuranTextChunker:
     def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 200):
@@ -11,7 +12,11 @@ class QuranTextChunker:
             is_separator_regex=False,
         )
     
-    def split_quran_data(self, quran_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def split_corpus(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Split korpus yang dibaca streaming (quran.json atau gragfinal.zip)"""
+        return self.split_quran_data(iter_surahs(path))
+
+    def split_quran_data(self, quran_data: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         chunks_with_metadata = []
         
         for surah in quran_data:
@@ -1,3 +1,4 @@
+import os
 from neo4j import GraphDatabase
 
 # Konfigurasi Neo4j
@@ -10,8 +11,78 @@ DIMENSION = 768  # Disesuaikan dengan model embedding yang digunakan
 LABEL = "Tafsir"  # Label node di Neo4j
 EMBEDDING_PROPERTY = "embedding"  # Properti yang menyimpan embedding
 
+# Lokasi korpus (quran.json, atau dibaca langsung dari arsip zip jika tidak ada)
+CORPUS_PATH = "quran.json"
+CORPUS_ARCHIVE = "gragfinal.zip"
+
+# Sumber VerseStore (lookup ayat di memori): "corpus" atau "graph"
+VERSE_STORE_SOURCE = "corpus"
+MAX_VERSE_REFS = 20  # Jumlah ayat maksimum dari satu pertanyaan (rentang/daftar)
+
+# Konfigurasi ingest
+EMBED_BATCH_SIZE = 64  # Jumlah chunk per panggilan encode
+EMBED_WORKERS = 0  # Jumlah proses encode paralel (0 = satu proses)
+INGEST_BATCH_SIZE = 256  # Jumlah ayat yang di-embed bersama dalam satu batch
+PIPELINE_QUEUE_SIZE = 4  # Jumlah batch maksimum yang antre di antara tahap pipeline
+PIPELINE_EMBED_THREADS = 1  # Jumlah thread tahap embedding
+WRITE_BATCH_SIZE = 500  # Jumlah baris per transaksi UNWIND ke Neo4j
+CHECKPOINT_FILE = ".ingest_checkpoint"  # Id ayat yang sudah commit pada run yang sedang berjalan (tidak di-commit ke git)
+
+# Konfigurasi KNN (knn.py)
+KNN_MEMORY_CAP_BYTES = 256 * 1024 * 1024  # Batas memori matriks similarity per blok
+KNN_RECALL_SAMPLE = 200  # Jumlah ayat sampel untuk mengukur recall@k backend ANN
+SIMILARITY_GRAPH_PATH = "similarity_graph"  # Direktori ekspor graph KNN dalam format CSR
+
+# Konfigurasi retrieval GraphRAG (search.py)
+RETRIEVAL_CANDIDATES = 10  # Kandidat dari vector index sebelum dipangkas
+RETRIEVAL_TOP_HITS = 3  # Hit vektor yang dipakai sebagai konteks utama
+RETRIEVAL_NEIGHBORS = 2  # Tetangga RELATED_TO per hit (0 untuk menonaktifkan ekspansi)
+RETRIEVAL_NEIGHBOR_WEIGHT = 0.8  # Skor tetangga = skor hit * similarity * bobot ini
+RETRIEVAL_LIMIT = 6  # Jumlah ayat maksimum dalam konteks
+FULLTEXT_INDEX_NAME = "ayat_fulltext"  # Index full-text atas text, translation, tafsir
+ARABIC_FULLTEXT_INDEX_NAME = "ayat_arabic_fulltext"  # Index full-text atas text_normalized
+FRAGMENT_MATCH_LIMIT = 5  # Jumlah ayat maksimum untuk jawaban "ayat apakah ini?"
+RRF_K = 60  # Konstanta reciprocal rank fusion
+HYBRID_LEXICAL_GRACE = 0.05  # Detik menunggu hasil leksikal sebelum mulai embedding
+HYBRID_DECISIVE_RATIO = 2.0  # Hasil leksikal cukup jika skor teratas >= rasio ini x skor kedua
+
+# Resource proses (resources.py)
+RESOURCE_HEALTH_INTERVAL = 300  # Detik antar health check Neo4j & Groq di thread latar
+
+# Layanan HTTP (service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
+SERVICE_REQUEST_TIMEOUT = 30  # Deadline maksimum per request (detik)
+SERVICE_EMBED_WORKERS = 2  # Thread untuk embedding query
+SERVICE_LLM_CONCURRENCY = 8  # Panggilan LLM bersamaan maksimum
+SERVICE_MAX_BODY_BYTES = 64 * 1024  # Ukuran body request maksimum
+
+# Batch query (batch_query.py)
+BATCH_QUERY_CHUNK = 256  # Pertanyaan per query UNWIND ke Neo4j
+BATCH_LLM_CONCURRENCY = 8  # Panggilan LLM bersamaan maksimum
+
+# Konfigurasi prompt (context_packer.py)
+PROMPT_TOKEN_BUDGET = 3000  # Perkiraan token maksimum prompt (instruksi + konteks + pertanyaan)
+TAFSIR_DEDUP_SIMILARITY = 0.8  # Kalimat tafsir dianggap duplikat jika kata-katanya tumpang tindih >= ini
+
+# Konfigurasi cache jawaban (answer_cache.py)
+ANSWER_CACHE_TTL = 24 * 3600  # Detik sebelum jawaban tersimpan kedaluwarsa
+ANSWER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Batas memori cache jawaban
+ANSWER_CACHE_SIMILARITY = 0.95  # Cosine minimum agar pertanyaan mirip dianggap hit
+ANSWER_CACHE_VERSION_CHECK = 60  # Detik antar pengecekan content_version di Neo4j
+
+# Konfigurasi cache embedding di disk (dipakai bersama semua script)
+EMBEDDING_CACHE_DIR = ".embedding_cache"  # None untuk menonaktifkan cache
+EMBEDDING_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Batas ukuran file vektor per model
+
 # Koneksi ke Neo4j
 driver = GraphDatabase.driver(URI, auth=AUTH)
 
 GROQ_API_KEY = "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"
-GROQ_MODEL = "llama3-70b-8192"  # Pastikan model ini benar
\ No newline at end of file
+GROQ_MODEL = "llama3-70b-8192"  # Pastikan model ini benar
+
+# Klien HTTP LLM (llm_client.py); arahkan GROQ_BASE_URL ke mock_llm_server.py untuk uji lokal
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_CONNECT_TIMEOUT = 10  # Detik untuk membuka koneksi
+LLM_READ_TIMEOUT = 120  # Detik menunggu data (juga jeda antar token saat streaming)
+LLM_MAX_CONNECTIONS = 20  # Koneksi keep-alive maksimum per klien
@@ -0,0 +1,160 @@
+"""Penyusun konteks prompt dengan batas token.
+
+Tafsir Kemenag untuk satu ayat bisa ribuan kata, dan tafsir ayat-ayat yang
+berdekatan sering mengulang paragraf yang sama. Packer ini menghitung token
+(heuristik, tanpa tokenizer), memberi setiap hit jatah sesuai skornya,
+memilih kalimat tafsir yang paling relevan dengan pertanyaan, membuang
+kalimat yang sudah muncul di hit lain, dan berhenti di batas budget.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Set
+from config import PROMPT_TOKEN_BUDGET, TAFSIR_DEDUP_SIMILARITY
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_PATTERN = re.compile(r"\w+")
+ELLIPSIS = " …"
+
+def count_tokens(text: str) -> int:
+    """Perkiraan jumlah token: ~4 karakter per token untuk teks latin, ~2 untuk teks Arab"""
+    if not text:
+        return 0
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return math.ceil((len(text) - non_ascii) / 4 + non_ascii / 2)
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text or "") if sentence.strip()]
+
+def word_set(text: str) -> Set[str]:
+    return set(WORD_PATTERN.findall(text.lower()))
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    if count_tokens(text) <= budget:
+        return text
+    words = text.split()
+    while words and count_tokens(" ".join(words) + ELLIPSIS) > budget:
+        words = words[:max(0, len(words) - max(1, len(words) // 8))]
+    return " ".join(words) + ELLIPSIS if words else ""
+
+class ContextPacker:
+    def __init__(self, budget: int = PROMPT_TOKEN_BUDGET, dedup_similarity: float = TAFSIR_DEDUP_SIMILARITY):
+        self.budget = budget
+        self.dedup_similarity = dedup_similarity
+        self._seen: List[Set[str]] = []  # Kalimat tafsir yang sudah masuk konteks
+
+    def _is_duplicate(self, words: Set[str]) -> bool:
+        for seen in self._seen:
+            overlap = len(words & seen) / max(1, min(len(words), len(seen)))
+            if overlap >= self.dedup_similarity:
+                return True
+        return False
+
+    def pick_tafsir(self, tafsir: str, budget: int, query_words: Set[str]) -> str:
+        """Kalimat tafsir yang paling relevan dalam batas budget, dalam urutan aslinya.
+
+        Relevansi = jumlah kata pertanyaan yang muncul di kalimat, dengan bonus
+        kecil untuk kalimat awal (biasanya ringkasan makna ayat).
+        """
+        candidates = []
+        for position, sentence in enumerate(split_sentences(tafsir)):
+            words = word_set(sentence)
+            if not words or self._is_duplicate(words):
+                continue
+            relevance = len(words & query_words) + 1.0 / (1 + position)
+            candidates.append((relevance, position, sentence, words))
+
+        chosen = []
+        used = 0
+        truncated = False
+        for relevance, position, sentence, words in sorted(candidates, key=lambda item: (-item[0], item[1])):
+            tokens = count_tokens(sentence) + 1
+            if used + tokens > budget:
+                if not chosen and budget > 0:
+                    # Kalimat pertama terlalu panjang: potong daripada tidak ada tafsir sama sekali
+                    # (truncate_to_tokens sudah menambahkan ELLIPSIS)
+                    shortened = truncate_to_tokens(sentence, budget)
+                    if shortened:
+                        chosen.append((position, shortened, words))
+                        truncated = True
+                    break
+                continue
+            chosen.append((position, sentence, words))
+            used += tokens
+
+        if not chosen:
+            return ""
+        chosen.sort()
+        self._seen.extend(words for _, _, words in chosen)
+        text = " ".join(sentence for _, sentence, _ in chosen)
+        if len(chosen) < len(candidates) and not truncated:
+            text += ELLIPSIS
+        return text
+
+    def pack(self, records: List[Dict], query_text: str = "", is_specific: bool = False,
+             overhead_tokens: int = 0) -> List[str]:
+        """Blok konteks per hit (format build_context), hit dengan skor tertinggi didahulukan.
+
+        Header (Arab + terjemahan) semua hit dipesan lebih dulu; tafsir hanya
+        dibagi dari sisa budget. Hit baru dibuang jika header-nya sendiri sudah
+        tidak muat, sehingga ayat yang diminta tidak kalah oleh tafsir ayat lain.
+        """
+        remaining = self.budget - overhead_tokens
+        query_words = word_set(query_text)
+        if not is_specific:
+            records = sorted(records, key=lambda record: record.get("score") or 0, reverse=True)
+
+        blocks = []  # (record, header, footer, token tetap)
+        for record in records:
+            try:
+                header = f"""
+            📖 Surah: {record['surah']}
+            Ayat {record['ayat_number']}:
+            Arab: {record.get('arabic', '')}
+            Terjemahan: {record.get('translation', '')}
+            Tafsir: """
+            except KeyError as e:
+                print(f"Error format data: {e}")
+                continue
+            if is_specific:
+                footer = "\n🔵 [AYAT SPESIFIK YANG DIMINTA]"
+            elif record.get('related_to'):
+                footer = f"\n🔗 [AYAT TERKAIT DENGAN {record['related_to']}]"
+            else:
+                footer = ""
+            blocks.append((record, header, footer, count_tokens(header) + count_tokens(footer) + 4))
+
+        kept = 0
+        fixed_total = 0
+        for *_, fixed_tokens in blocks:
+            if fixed_total + fixed_tokens > remaining:
+                break
+            fixed_total += fixed_tokens
+            kept += 1
+        if blocks and not kept:
+            # Header pertama pun tidak muat: potong daripada konteks kosong
+            record, header, footer, _ = blocks[0]
+            header = truncate_to_tokens(header, max(remaining - count_tokens(footer) - 4, 0))
+            blocks[0] = (record, header, footer, remaining)
+            kept = 1
+        if kept < len(blocks):
+            print(f"✂️ Budget prompt habis, {len(blocks) - kept} hit dilewati")
+        blocks = blocks[:kept]
+        weights = [max(record.get("score") or 0, 0) or 1.0 for record, *_ in blocks]
+
+        context = []
+        for index, (record, header, footer, fixed_tokens) in enumerate(blocks):
+            # Jatah tafsir sebanding dengan skor hit terhadap sisa hit, setelah header sisa hit dipesan
+            reserved = sum(block[3] for block in blocks[index + 1:])
+            share = weights[index] / sum(weights[index:])
+            tafsir_budget = max(int((remaining - fixed_tokens - reserved) * share), 0)
+            tafsir = self.pick_tafsir(record.get('tafsir', ''), tafsir_budget, query_words)
+
+            block = f"{header}{tafsir}\n            {footer}"
+            context.append(block)
+            remaining -= count_tokens(block)
+        return context
+
+def pack_context(records: List[Dict], query_text: str = "", is_specific: bool = False,
+                 overhead_tokens: int = 0, budget: Optional[int] = None) -> List[str]:
+    packer = ContextPacker(budget if budget is not None else PROMPT_TOKEN_BUDGET)
+    return packer.pack(records, query_text, is_specific, overhead_tokens)
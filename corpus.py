@@ -0,0 +1,119 @@
+"""Pembaca korpus quran.json secara streaming.
+
+Korpus dibaca satu surah per satu surah (tidak pernah seluruh file sekaligus),
+baik dari quran.json maupun langsung dari dalam gragfinal.zip tanpa ekstraksi.
+"""
+import io
+import json
+import os
+import zipfile
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+from config import CORPUS_PATH, CORPUS_ARCHIVE
+
+class SurahInfo(NamedTuple):
+    id: str  # ObjectId surah di sumber data
+    number: int
+    name: str
+    name_latin: str
+    number_of_ayah: int
+
+class Verse(NamedTuple):
+    surah_id: str
+    surah_number: int
+    surah_name: str
+    surah_name_latin: str
+    number: int
+    text: str
+    translation: str
+    tafsir: str
+
+def resolve_corpus_path(path: Optional[str] = None) -> str:
+    """Pakai quran.json jika ada, jika tidak pakai arsip gragfinal.zip"""
+    if path:
+        return path
+    if os.path.exists(CORPUS_PATH):
+        return CORPUS_PATH
+    return CORPUS_ARCHIVE
+
+def open_corpus(path: Optional[str] = None) -> io.TextIOBase:
+    path = resolve_corpus_path(path)
+    if not zipfile.is_zipfile(path):
+        return open(path, "r", encoding="utf-8")
+    
+    archive = zipfile.ZipFile(path)
+    member = next(name for name in archive.namelist() if os.path.basename(name) == "quran.json")
+    return io.TextIOWrapper(archive.open(member), encoding="utf-8")
+
+def _skip_separators(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ","):
+        pos += 1
+    return pos
+
+def _iter_json_array(stream: io.TextIOBase, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Decode elemen array JSON tingkat atas satu per satu"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    read_size = chunk_size
+    
+    while True:
+        chunk = stream.read(read_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        
+        if not started:
+            pos = _skip_separators(buffer, pos)
+            if pos < len(buffer):
+                if buffer[pos] != "[":
+                    raise ValueError("Korpus harus berupa array JSON")
+                started = True
+                pos += 1
+        
+        while started:
+            pos = _skip_separators(buffer, pos)
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Elemen belum lengkap, baca lagi
+            read_size = chunk_size
+            yield item
+        
+        if not chunk:
+            raise ValueError("Korpus JSON terpotong")
+        # Elemen besar (mis. Al-Baqarah beserta tafsirnya): perbesar bacaan berikutnya
+        read_size = max(chunk_size, len(buffer) - pos)
+
+def iter_surahs(path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Hasilkan dict surah mentah (format quran.json), satu per satu"""
+    with open_corpus(path) as stream:
+        yield from _iter_json_array(stream)
+
+def iter_surah_info(path: Optional[str] = None) -> Iterator[SurahInfo]:
+    for surah in iter_surahs(path):
+        yield SurahInfo(
+            id=surah["_id"]["$oid"],
+            number=int(surah["number"]),
+            name=surah["name"],
+            name_latin=surah["name_latin"],
+            number_of_ayah=int(surah["number_of_ayah"])
+        )
+
+def iter_verses(path: Optional[str] = None) -> Iterator[Verse]:
+    """Hasilkan setiap ayat sebagai Verse, urut per surah"""
+    for surah in iter_surahs(path):
+        translations = surah.get("translations", {}).get("id", {}).get("text", {})
+        tafsirs = surah.get("tafsir", {}).get("id", {}).get("kemenag", {}).get("text", {})
+        for ayah_num, ayah_text in surah["text"].items():
+            yield Verse(
+                surah_id=surah["_id"]["$oid"],
+                surah_number=int(surah["number"]),
+                surah_name=surah["name"],
+                surah_name_latin=surah["name_latin"],
+                number=int(ayah_num),
+                text=ayah_text,
+                translation=translations.get(ayah_num, ""),
+                tafsir=tafsirs.get(ayah_num, "")
+            )
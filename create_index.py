@@ -31,6 +31,25 @@ def create_indices():
                 }
             """, dim=DIMENSION)
 
+            # Index full-text untuk pencarian kata kunci (nama, istilah seperti "riba")
+            session.run("""
+                CREATE FULLTEXT INDEX ayat_fulltext IF NOT EXISTS
+                FOR (a:Ayat)
+                ON EACH [a.text, a.translation, a.tafsir]
+            """)
+
+            # Index full-text teks Arab ternormalisasi (tanpa harakat) untuk potongan ayat
+            session.run("""
+                CREATE FULLTEXT INDEX ayat_arabic_fulltext IF NOT EXISTS
+                FOR (a:Ayat)
+                ON EACH [a.text_normalized]
+                OPTIONS {
+                    indexConfig: {
+                        `fulltext.analyzer`: 'whitespace'
+                    }
+                }
+            """)
+
             # Verifikasi indeks yang berhasil dibuat
             check = session.run("""
                 SHOW INDEXES 
@@ -40,13 +59,21 @@ def create_indices():
 
             created_indexes = [record["name"] for record in check]
 
-            if "ayat_embeddings" in created_indexes and "surah_embeddings" in created_indexes:
-                print("✅ Semua indeks vektor berhasil dibuat")
+            fulltext = session.run("""
+                SHOW INDEXES
+                WHERE name IN ['ayat_fulltext', 'ayat_arabic_fulltext'] AND type = 'FULLTEXT'
+            """)
+            created_indexes += [record["name"] for record in fulltext]
+
+            if all(name in created_indexes for name in ["ayat_embeddings", "surah_embeddings", "ayat_fulltext", "ayat_arabic_fulltext"]):
+                print("✅ Semua indeks berhasil dibuat")
                 print("Detail Index:")
                 print(f"- Nama: ayat_embeddings (Ayat)")
                 print(f"- Nama: surah_embeddings (Surah)")
                 print(f"- Dimensi: {DIMENSION}")
                 print(f"- Similarity Function: cosine")
+                print(f"- Nama: ayat_fulltext (Ayat: text, translation, tafsir)")
+                print(f"- Nama: ayat_arabic_fulltext (Ayat: text_normalized)")
             else:
                 print("❌ Gagal membuat salah satu indeks!")
                 sys.exit(1)
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_BYTES
+
+class EmbeddingCache:
+    """Cache embedding di disk, dikunci dengan (nama model, hash teks).
+
+    Vektor float32 disimpan di satu file yang di-memory-map (`vectors.f32`),
+    sedangkan index key -> slot disimpan di SQLite. Kapasitas ditentukan oleh
+    `max_bytes`; jika penuh, entry yang paling lama tidak dipakai dibuang (LRU).
+
+    Cache dipakai bersama oleh beberapa proses (app, service, batch, ingest).
+    Penulisan memegang lock EXCLUSIVE SQLite selama alokasi slot, penulisan
+    vektor, dan commit index; pembacaan memegang lock SHARED selama vektor
+    disalin. Karena itu slot tidak pernah dipilih ganda atau ditimpa saat
+    sedang dibaca proses lain. Index memakai journal rollback (bukan WAL)
+    agar lock SHARED benar-benar menahan penulis.
+    """
+
+    def __init__(self, model_name, dimension, directory=EMBEDDING_CACHE_DIR, max_bytes=EMBEDDING_CACHE_MAX_BYTES):
+        self.dimension = dimension
+        self.capacity = max(1, max_bytes // (dimension * 4))
+        
+        # Satu direktori per model, jadi key cukup hash teksnya
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.directory = os.path.join(directory, f"{safe_name}-{dimension}")
+        os.makedirs(self.directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        # timeout: tunggu lock proses lain, bukan langsung gagal "database is locked"
+        self.index = sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite"), timeout=30, check_same_thread=False
+        )
+        self.index.execute("PRAGMA journal_mode=DELETE")
+        self.index.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER UNIQUE, last_used REAL)"
+        )
+        self.index.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        
+        vectors_path = os.path.join(self.directory, "vectors.f32")
+        expected_size = self.capacity * dimension * 4
+        self.index.execute("BEGIN EXCLUSIVE")  # Jangan sampai dua proses membuat ulang file bersamaan
+        try:
+            if os.path.exists(vectors_path) and os.path.getsize(vectors_path) == expected_size:
+                self.vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, dimension))
+            else:
+                # Kapasitas berubah atau file belum ada: mulai dari cache kosong
+                self.vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=(self.capacity, dimension))
+                self.index.execute("DELETE FROM entries")
+            self.index.commit()
+        except Exception:
+            self.index.rollback()
+            raise
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Kembalikan list vektor (atau None jika tidak ada di cache) sesuai urutan texts"""
+        with self._lock:
+            return self._get_many(texts)
+
+    def put_many(self, texts, vectors):
+        with self._lock:
+            self._put_many(texts, vectors)
+
+    def _get_many(self, texts):
+        keys = [self.key(text) for text in texts]
+        slots = {}
+        # Lock SHARED dipegang sampai vektor selesai disalin (lihat docstring kelas)
+        self.index.execute("BEGIN")
+        try:
+            for start in range(0, len(keys), 500):  # Batas jumlah parameter SQLite
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.index.execute(f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", chunk)
+                slots.update(rows.fetchall())
+            found = {key: np.array(self.vectors[slot]) for key, slot in slots.items()}
+        finally:
+            self.index.commit()
+        
+        # Update LRU di transaksi terpisah: upgrade SHARED -> tulis bisa deadlock antar pembaca
+        if slots:
+            now = time.time()
+            self.index.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in slots])
+            self.index.commit()
+        
+        return [found.get(key) for key in keys]
+
+    def _put_many(self, texts, vectors):
+        entries = {}
+        for text, vector in zip(texts, vectors):
+            entries[self.key(text)] = vector
+        if not entries:
+            return
+        
+        self.index.execute("BEGIN EXCLUSIVE")
+        try:
+            self._write_entries(entries)
+            self.index.commit()
+        except Exception:
+            self.index.rollback()
+            raise
+
+    def _write_entries(self, entries):
+        now = time.time()
+        keys = list(entries)
+        existing = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            existing.update(self.index.execute(f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", chunk))
+        # Tandai dipakai dulu supaya entry batch ini tidak ikut terbuang
+        self.index.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in existing])
+        
+        new_keys = [key for key in keys if key not in existing][:self.capacity]
+        free_slots = self._allocate_slots(len(new_keys), len(self))
+        
+        rows = []
+        for key, slot in list(existing.items()) + list(zip(new_keys, free_slots)):
+            self.vectors[slot] = np.asarray(entries[key], dtype=np.float32)
+            rows.append((key, slot, now))
+        
+        # Vektor ditulis dulu, baru index-nya di-commit (oleh _put_many)
+        self.vectors.flush()
+        self.index.executemany("INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)", rows)
+
+    def _allocate_slots(self, count, used):
+        """Ambil slot kosong; jika kurang, buang entry yang paling lama tidak dipakai"""
+        free = list(range(used, min(self.capacity, used + count)))
+        missing = count - len(free)
+        if missing > 0:
+            evicted = self.index.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (missing,)
+            ).fetchall()
+            self.index.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+            free.extend(slot for _, slot in evicted)
+        return free
+
+    def __len__(self):
+        return self.index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
@@ -0,0 +1,109 @@
+"""Ekspor korpus + embedding ke format CSV `neo4j-admin database import`.
+
+Untuk environment baru, file hasil ekspor bisa di-import offline dalam hitungan
+detik, jauh lebih cepat daripada memuat lewat transaksi di insert_data.py.
+Embedding diambil dari cache embedding (hanya teks yang belum ada yang di-encode).
+"""
+import argparse
+import csv
+import gzip
+import os
+import time
+from tqdm import tqdm
+from config import INGEST_BATCH_SIZE
+from corpus import iter_surah_info, iter_verses
+from insert_data import (
+    build_surah_text,
+    embed_documents,
+    iter_ayah_rows,
+    iter_batches,
+    surah_content_hash
+)
+
+ARRAY_DELIMITER = ";"
+
+NODE_FILES = ["quran.csv.gz", "surah.csv.gz", "ayat.csv.gz"]
+RELATIONSHIP_FILES = ["has_surah.csv.gz", "has_ayat.csv.gz"]
+
+def surah_id(surah_number):
+    return f"s{surah_number}"
+
+def ayat_id(surah_number, ayah_number):
+    return f"s{surah_number}:{ayah_number}"
+
+def format_vector(vector):
+    return ARRAY_DELIMITER.join(f"{value:.9g}" for value in vector)
+
+def open_csv(output_dir, name):
+    file = gzip.open(os.path.join(output_dir, name), "wt", encoding="utf-8", newline="")
+    return file, csv.writer(file)
+
+def export_import_files(output_dir="import"):
+    os.makedirs(output_dir, exist_ok=True)
+    
+    quran_file, quran_csv = open_csv(output_dir, "quran.csv.gz")
+    surah_file, surah_csv = open_csv(output_dir, "surah.csv.gz")
+    ayat_file, ayat_csv = open_csv(output_dir, "ayat.csv.gz")
+    has_surah_file, has_surah_csv = open_csv(output_dir, "has_surah.csv.gz")
+    has_ayat_file, has_ayat_csv = open_csv(output_dir, "has_ayat.csv.gz")
+    
+    try:
+        quran_csv.writerow([":ID", "name", "content_version:long", ":LABEL"])
+        quran_csv.writerow(["quran", "Al-Quran", int(time.time() * 1000), "Quran"])
+        
+        surah_csv.writerow([
+            ":ID", "number:int", "name", "name_latin", "number_of_ayah:int",
+            "embedding:float[]", "content_hash", ":LABEL"
+        ])
+        has_surah_csv.writerow([":START_ID", ":END_ID", ":TYPE"])
+        
+        surahs = list(iter_surah_info())
+        surah_embeddings = embed_documents([build_surah_text(surah) for surah in surahs])
+        for surah, embedding in zip(surahs, surah_embeddings):
+            surah_csv.writerow([
+                surah_id(surah.number), surah.number, surah.name, surah.name_latin,
+                surah.number_of_ayah, format_vector(embedding), surah_content_hash(surah), "Surah"
+            ])
+            has_surah_csv.writerow(["quran", surah_id(surah.number), "HAS_SURAH"])
+        
+        ayat_csv.writerow([
+            ":ID", "surah_number:int", "number:int", "text", "text_normalized", "translation", "tafsir",
+            "embedding:float[]", "content_hash", ":LABEL"
+        ])
+        has_ayat_csv.writerow([":START_ID", ":END_ID", ":TYPE"])
+        
+        progress_bar = tqdm(total=sum(surah.number_of_ayah for surah in surahs), desc="Mengekspor Ayat")
+        for batch in iter_batches(iter_ayah_rows(iter_verses()), INGEST_BATCH_SIZE):
+            ayah_embeddings = embed_documents([row["embed_text"] for row in batch])
+            for row, embedding in zip(batch, ayah_embeddings):
+                node_id = ayat_id(row["surah_number"], row["number"])
+                ayat_csv.writerow([
+                    node_id, row["surah_number"], row["number"], row["text"], row["text_normalized"], row["translation"],
+                    row["tafsir"], format_vector(embedding), row["content_hash"], "Ayat"
+                ])
+                has_ayat_csv.writerow([surah_id(row["surah_number"]), node_id, "HAS_AYAT"])
+            progress_bar.update(len(batch))
+        progress_bar.close()
+    finally:
+        for file in (quran_file, surah_file, ayat_file, has_surah_file, has_ayat_file):
+            file.close()
+    
+    print(f"✅ File import berhasil dibuat di {output_dir}/")
+    print("Jalankan (dengan database dalam keadaan berhenti):")
+    print(import_command(output_dir))
+    print("Setelah itu jalankan create_index.py untuk membuat indeks vektor.")
+
+def import_command(output_dir, database="neo4j"):
+    nodes = " ".join(f"--nodes={os.path.join(output_dir, name)}" for name in NODE_FILES)
+    relationships = " ".join(f"--relationships={os.path.join(output_dir, name)}" for name in RELATIONSHIP_FILES)
+    # Tafsir mengandung baris baru, jadi multiline-fields wajib aktif
+    return (
+        f"neo4j-admin database import full {database} {nodes} {relationships} "
+        f"--array-delimiter='{ARRAY_DELIMITER}' --multiline-fields=true --overwrite-destination"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ekspor data Al-Quran untuk neo4j-admin database import")
+    parser.add_argument("--output-dir", default="import", help="Direktori tujuan file CSV")
+    args = parser.parse_args()
+    export_import_files(args.output_dir)
@@ -0,0 +1,298 @@
+from config import WRITE_BATCH_SIZE
+from arabic_text import normalize_arabic
+
+SCHEMA_QUERIES = [
+    # Dipakai MATCH (s:Surah {number: ...}) saat menulis ayat
+    "CREATE CONSTRAINT surah_number IF NOT EXISTS FOR (s:Surah) REQUIRE s.number IS UNIQUE",
+    "CREATE CONSTRAINT quran_name IF NOT EXISTS FOR (q:Quran) REQUIRE q.name IS UNIQUE",
+    # Kunci ayat: (nomor surah, nomor ayat)
+    "CREATE INDEX ayat_key IF NOT EXISTS FOR (a:Ayat) ON (a.surah_number, a.number)",
+]
+
+# Graph lama belum menyimpan surah_number di node Ayat
+MIGRATE_AYAT_KEY_QUERY = """
+MATCH (s:Surah)-[:HAS_AYAT]->(a:Ayat)
+WHERE a.surah_number IS NULL
+SET a.surah_number = s.number
+"""
+
+SURAH_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (q:Quran {name: 'Al-Quran'})
+MERGE (s:Surah {number: row.number})
+SET s.name = row.name,
+    s.name_latin = row.name_latin,
+    s.number_of_ayah = row.number_of_ayah,
+    s.embedding = row.embedding,
+    s.content_hash = row.content_hash
+MERGE (q)-[:HAS_SURAH]->(s)
+"""
+
+AYAT_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (s:Surah {number: row.surah_number})
+MERGE (a:Ayat {surah_number: row.surah_number, number: row.number})
+SET a.text = row.text,
+    a.text_normalized = row.text_normalized,
+    a.translation = row.translation,
+    a.tafsir = row.tafsir,
+    a.embedding = row.embedding,
+    a.content_hash = row.content_hash
+MERGE (s)-[:HAS_AYAT]->(a)
+"""
+
+def ensure_schema(driver):
+    """Buat constraint/index yang dibutuhkan penulisan batch"""
+    with driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query)
+        session.run(MIGRATE_AYAT_KEY_QUERY)
+        session.run("MERGE (:Quran {name: 'Al-Quran'})")  # Root node Al-Quran
+
+def bump_content_version(driver):
+    """Tandai bahwa isi Surah/Ayat berubah; dipakai answer_cache untuk invalidasi.
+
+    Versi berupa timestamp (ms), jadi tetap berubah setelah graph dibangun ulang dengan --full.
+    """
+    with driver.session() as session:
+        record = session.run(
+            """MERGE (q:Quran {name: 'Al-Quran'})
+            SET q.content_version = timestamp()
+            RETURN q.content_version AS version"""
+        ).single()
+    return record["version"]
+
+def load_content_version(driver):
+    records, _, _ = driver.execute_query(
+        "MATCH (q:Quran {name: 'Al-Quran'}) RETURN q.content_version AS version"
+    )
+    return records[0]["version"] if records else None
+
+def load_content_hashes(driver):
+    """Ambil content_hash yang tersimpan: ({nomor surah: hash}, {(surah, ayat): hash})"""
+    with driver.session() as session:
+        surah_hashes = {
+            record["number"]: record["content_hash"]
+            for record in session.run("MATCH (s:Surah) RETURN s.number AS number, s.content_hash AS content_hash")
+        }
+        ayat_hashes = {
+            (record["surah_number"], record["number"]): record["content_hash"]
+            for record in session.run(
+                """MATCH (a:Ayat)
+                RETURN a.surah_number AS surah_number, a.number AS number, a.content_hash AS content_hash"""
+            )
+        }
+    return surah_hashes, ayat_hashes
+
+def _run_batch(tx, query, rows):
+    tx.run(query, rows=rows).consume()
+
+TEXT_NORMALIZED_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Ayat {surah_number: row.surah_number, number: row.number})
+SET a.text_normalized = row.text_normalized
+"""
+
+def backfill_text_normalized(driver, batch_size=WRITE_BATCH_SIZE):
+    """Isi text_normalized untuk Ayat lama yang ditulis sebelum properti ini ada"""
+    with driver.session() as session:
+        rows = [
+            {
+                "surah_number": record["surah_number"],
+                "number": record["number"],
+                "text_normalized": normalize_arabic(record["text"])
+            }
+            for record in session.run(
+                """MATCH (a:Ayat) WHERE a.text_normalized IS NULL AND a.text IS NOT NULL
+                RETURN a.surah_number AS surah_number, a.number AS number, a.text AS text"""
+            )
+        ]
+        for start in range(0, len(rows), batch_size):
+            session.execute_write(_run_batch, TEXT_NORMALIZED_QUERY, rows[start:start + batch_size])
+    if rows:
+        print(f"🔤 text_normalized diisi untuk {len(rows)} ayat lama")
+    return len(rows)
+
+class BulkGraphWriter:
+    """Menulis node Surah/Ayat secara batch lewat UNWIND dalam managed write transaction.
+
+    Baris ditampung di buffer dan dikirim setiap `batch_size` baris, sehingga
+    satu round trip ke Neo4j membawa banyak ayat sekaligus. Node di-MERGE
+    berdasarkan kuncinya, jadi menulis ulang ayat yang sama akan meng-update.
+    `on_commit` (opsional) dipanggil dengan baris ayat setelah transaksinya commit.
+    """
+
+    def __init__(self, driver, batch_size=WRITE_BATCH_SIZE, on_commit=None):
+        self.driver = driver
+        self.batch_size = batch_size
+        self.on_commit = on_commit
+        self._buffers = {SURAH_BATCH_QUERY: [], AYAT_BATCH_QUERY: []}
+
+    def __enter__(self):
+        self.session = self.driver.session()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.session.close()
+
+    def add_surah(self, row):
+        self._add(SURAH_BATCH_QUERY, row)
+
+    def add_ayat(self, row):
+        # Surah harus sudah tertulis sebelum ayatnya di-MATCH
+        self._flush_query(SURAH_BATCH_QUERY)
+        self._add(AYAT_BATCH_QUERY, row)
+
+    def flush(self):
+        self._flush_query(SURAH_BATCH_QUERY)
+        self._flush_query(AYAT_BATCH_QUERY)
+
+    def _add(self, query, row):
+        buffer = self._buffers[query]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._flush_query(query)
+
+    def _flush_query(self, query):
+        rows = self._buffers[query]
+        if rows:
+            self.session.execute_write(_run_batch, query, rows)
+            self._buffers[query] = []
+            if query is AYAT_BATCH_QUERY and self.on_commit:
+                self.on_commit(rows)
+
+# Ayat dicari lewat index komposit ayat_key (surah_number, number)
+RELATED_TO_QUERY = """
+UNWIND $rows AS rel
+MATCH (a:Ayat {surah_number: rel.surah_number_1, number: rel.ayah_number_1})
+MATCH (b:Ayat {surah_number: rel.surah_number_2, number: rel.ayah_number_2})
+MERGE (a)-[r:RELATED_TO]->(b)
+SET r.similarity = rel.similarity
+"""
+
+RELATED_TO_BOTH_QUERY = RELATED_TO_QUERY + """
+MERGE (b)-[r2:RELATED_TO]->(a)
+SET r2.similarity = rel.similarity
+"""
+
+class RelationWriter:
+    """Menulis relasi RELATED_TO secara batch.
+
+    Setiap pasangan ayat hanya dikirim sekali per run. Dengan `symmetric=True`
+    similarity disimpan sebagai satu relasi (dari kunci ayat yang lebih kecil ke
+    yang lebih besar, dibaca tanpa arah saat query); jika tidak, dibuat dua
+    relasi berlawanan arah seperti sebelumnya.
+    """
+
+    def __init__(self, session, symmetric=False, batch_size=WRITE_BATCH_SIZE * 10):
+        self.session = session
+        self.symmetric = symmetric
+        self.batch_size = batch_size
+        self.query = RELATED_TO_QUERY if symmetric else RELATED_TO_BOTH_QUERY
+        self.written = 0  # Jumlah relasi yang dibuat/di-update
+        self._seen = set()
+        self._rows = []
+
+    def add(self, key_1, key_2, similarity):
+        """key_1/key_2: (nomor surah, nomor ayat)"""
+        if key_2 < key_1:
+            key_1, key_2 = key_2, key_1
+        if (key_1, key_2) in self._seen:
+            return
+        self._seen.add((key_1, key_2))
+        self._rows.append({
+            "surah_number_1": key_1[0],
+            "ayah_number_1": key_1[1],
+            "surah_number_2": key_2[0],
+            "ayah_number_2": key_2[1],
+            "similarity": float(similarity)
+        })
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self.session.execute_write(_run_batch, self.query, self._rows)
+            self.written += len(self._rows) * (1 if self.symmetric else 2)
+            self._rows = []
+
+DELETE_RELATIONS_OF_QUERY = """
+UNWIND $rows AS key
+MATCH (a:Ayat {surah_number: key.surah_number, number: key.number})-[r:RELATED_TO]-()
+DELETE r
+"""
+
+DELETE_RELATIONS_BETWEEN_QUERY = """
+UNWIND $rows AS rel
+MATCH (a:Ayat {surah_number: rel.surah_number_1, number: rel.ayah_number_1})
+      -[r:RELATED_TO]-(b:Ayat {surah_number: rel.surah_number_2, number: rel.ayah_number_2})
+DELETE r
+"""
+
+RELATED_NEIGHBORS_QUERY = """
+UNWIND $rows AS key
+MATCH (a:Ayat {surah_number: key.surah_number, number: key.number})-[:RELATED_TO]-(b:Ayat)
+RETURN DISTINCT a.surah_number AS surah_number, a.number AS number,
+       b.surah_number AS neighbor_surah_number, b.number AS neighbor_number
+"""
+
+MARK_KNN_CURRENT_QUERY = """
+UNWIND $rows AS key
+MATCH (a:Ayat {surah_number: key.surah_number, number: key.number})
+SET a.knn_hash = a.content_hash
+"""
+
+def _key_rows(keys):
+    return [{"surah_number": surah, "number": number} for surah, number in keys]
+
+def _pair_rows(pairs):
+    return [
+        {"surah_number_1": key_1[0], "ayah_number_1": key_1[1], "surah_number_2": key_2[0], "ayah_number_2": key_2[1]}
+        for key_1, key_2 in pairs
+    ]
+
+def _run_in_batches(session, query, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        session.execute_write(_run_batch, query, rows[start:start + batch_size])
+
+def delete_relations_of(session, keys, batch_size=100):
+    """Hapus semua RELATED_TO milik ayat-ayat `keys`, dalam transaksi kecil"""
+    _run_in_batches(session, DELETE_RELATIONS_OF_QUERY, _key_rows(keys), batch_size)
+
+def delete_relations_between(session, pairs, batch_size=500):
+    """Hapus RELATED_TO (arah mana pun) di antara pasangan kunci ayat"""
+    _run_in_batches(session, DELETE_RELATIONS_BETWEEN_QUERY, _pair_rows(pairs), batch_size)
+
+def load_related_neighbors(session, keys, batch_size=500):
+    """Tetangga RELATED_TO yang tersimpan saat ini: {kunci ayat: set(kunci tetangga)}"""
+    neighbors = {key: set() for key in keys}
+    rows = _key_rows(keys)
+    for start in range(0, len(rows), batch_size):
+        for record in session.run(RELATED_NEIGHBORS_QUERY, rows=rows[start:start + batch_size]):
+            neighbors[(record["surah_number"], record["number"])].add(
+                (record["neighbor_surah_number"], record["neighbor_number"])
+            )
+    return neighbors
+
+def mark_knn_current(session, keys=None, batch_size=1000):
+    """Tandai relasi KNN ayat sudah sesuai isinya (knn_hash = content_hash); None = semua ayat"""
+    if keys is None:
+        session.run("""
+            MATCH (a:Ayat) WHERE a.content_hash IS NOT NULL
+            CALL { WITH a SET a.knn_hash = a.content_hash } IN TRANSACTIONS OF 10000 ROWS
+        """).consume()
+        return
+    _run_in_batches(session, MARK_KNN_CURRENT_QUERY, _key_rows(keys), batch_size)
+
+def load_knn_stale_keys(session):
+    """Ayat yang baru atau isinya berubah sejak relasi KNN terakhir dihitung"""
+    result = session.run("""
+        MATCH (a:Ayat)
+        WHERE a.embedding IS NOT NULL AND (a.knn_hash IS NULL OR a.knn_hash <> a.content_hash)
+        RETURN a.surah_number AS surah_number, a.number AS number
+    """)
+    return [(record["surah_number"], record["number"]) for record in result]
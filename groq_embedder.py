@@ -1,15 +1,60 @@
+import numpy as np
 from neo4j_graphrag.embeddings.base import Embedder as BaseEmbedder
 from sentence_transformers import SentenceTransformer
+from config import EMBEDDING_CACHE_DIR
+from embedding_cache import EmbeddingCache
 
 class SentenceTransformerEmbedder(BaseEmbedder):
-    def __init__(self, model_name="all-mpnet-base-v2"):
+    def __init__(self, model_name="all-mpnet-base-v2", use_cache=True):
         self.model = SentenceTransformer(model_name)
+        self.cache = None
+        if use_cache and EMBEDDING_CACHE_DIR:
+            self.cache = EmbeddingCache(model_name, self.model.get_sentence_embedding_dimension())
     
     def embed_text(self, text: str):
-        return self.model.encode(text).tolist()
+        return self.embed_batch([text])[0].tolist()
     
     def embed_query(self, query: str):
         return self.embed_text(query)
 
+    def embed_batch(self, texts, batch_size=64, pool=None):
+        """Encode banyak teks sekaligus, hasilnya array numpy (len(texts), dimensi).
+
+        Teks yang sudah ada di cache tidak di-encode ulang.
+        """
+        if self.cache is None:
+            return self._encode(texts, batch_size, pool)
+        
+        cached = self.cache.get_many(texts)
+        missing = [text for text, vector in zip(texts, cached) if vector is None]
+        if missing:
+            # Teks duplikat cukup di-encode sekali
+            unique_missing = list(dict.fromkeys(missing))
+            encoded = self._encode(unique_missing, batch_size, pool)
+            self.cache.put_many(unique_missing, encoded)
+            encoded_by_text = dict(zip(unique_missing, encoded))
+            cached = [encoded_by_text[text] if vector is None else vector for text, vector in zip(texts, cached)]
+        
+        if not cached:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack(cached).astype(np.float32, copy=False)
+
+    def _encode(self, texts, batch_size, pool):
+        if pool is not None:
+            return self.model.encode_multi_process(texts, pool, batch_size=batch_size)
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    def start_pool(self, workers):
+        """Jalankan worker multi-proses (CPU) untuk embed_batch"""
+        return self.model.start_multi_process_pool(target_devices=["cpu"] * workers)
+
+    def stop_pool(self, pool):
+        self.model.stop_multi_process_pool(pool)
+
 # Inisialisasi dengan model default
-Embedder = SentenceTransformerEmbedder()
\ No newline at end of file
+Embedder = SentenceTransformerEmbedder()
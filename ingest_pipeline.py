@@ -0,0 +1,136 @@
+"""Pipeline ingest bertahap: baca korpus -> embed -> tulis ke Neo4j.
+
+Setiap tahap berjalan di thread sendiri dan dihubungkan dengan antrian
+berkapasitas terbatas (backpressure), sehingga model embedding dan Neo4j
+bisa sibuk bersamaan alih-alih bergantian.
+"""
+import queue
+import threading
+from tqdm import tqdm
+from config import INGEST_BATCH_SIZE, PIPELINE_QUEUE_SIZE, PIPELINE_EMBED_THREADS
+
+_DONE = object()  # Penanda akhir aliran data
+
+class IngestPipeline:
+    def __init__(self, writer, embed_fn, batch_size=INGEST_BATCH_SIZE,
+                 queue_size=PIPELINE_QUEUE_SIZE, embed_threads=PIPELINE_EMBED_THREADS):
+        """
+        writer: BulkGraphWriter tujuan (dipakai hanya dari thread pemanggil run)
+        embed_fn: fungsi list teks -> list embedding (mis. insert_data.embed_documents)
+        """
+        self.writer = writer
+        self.embed_fn = embed_fn
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.embed_threads = embed_threads
+        self._stop = threading.Event()
+        self._errors = []
+
+    def run(self, rows):
+        """Proses semua baris ayat; return jumlah ayat yang ditulis"""
+        read_queue = queue.Queue(self.queue_size)
+        write_queue = queue.Queue(self.queue_size)
+        
+        bars = {
+            "baca": tqdm(desc="Baca ", unit="ayat", position=0),
+            "embed": tqdm(desc="Embed", unit="ayat", position=1),
+            "tulis": tqdm(desc="Tulis", unit="ayat", position=2),
+        }
+        
+        threads = [threading.Thread(target=self._read, args=(rows, read_queue, bars["baca"]), daemon=True)]
+        threads += [
+            threading.Thread(target=self._embed, args=(read_queue, write_queue, bars["embed"]), daemon=True)
+            for _ in range(self.embed_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        written = 0
+        try:
+            written = self._write(write_queue, bars["tulis"])
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            for bar in bars.values():
+                bar.close()
+        
+        if self._errors:
+            raise self._errors[0]
+        return written
+
+    def _put(self, target_queue, item):
+        # Tunggu slot kosong, tapi berhenti jika tahap lain gagal
+        while not self._stop.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source_queue):
+        while not self._stop.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._stop.set()
+
+    def _read(self, rows, read_queue, bar):
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    if not self._put(read_queue, batch):
+                        return
+                    bar.update(len(batch))
+                    batch = []
+            if batch and self._put(read_queue, batch):
+                bar.update(len(batch))
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.embed_threads):
+                self._put(read_queue, _DONE)
+
+    def _embed(self, read_queue, write_queue, bar):
+        try:
+            while True:
+                batch = self._get(read_queue)
+                if batch is _DONE:
+                    break
+                embeddings = self.embed_fn([row["embed_text"] for row in batch])
+                if not self._put(write_queue, list(zip(batch, embeddings))):
+                    break
+                bar.update(len(batch))
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(write_queue, _DONE)
+
+    def _write(self, write_queue, bar):
+        written = 0
+        finished = 0
+        while finished < self.embed_threads:
+            batch = self._get(write_queue)
+            if batch is _DONE:
+                if self._stop.is_set():
+                    break
+                finished += 1
+                continue
+            for row, embedding in batch:
+                # Teruskan semua kolom kecuali teks embedding, agar kolom baru tidak ikut terbuang
+                ayat = {key: value for key, value in row.items() if key != "embed_text"}
+                ayat["embedding"] = embedding
+                self.writer.add_ayat(ayat)
+            written += len(batch)
+            bar.update(len(batch))
+        return written
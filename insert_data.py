@@ -1,9 +1,16 @@
-import json
+import argparse
+import hashlib
+import os
 import numpy as np
 from neo4j import GraphDatabase
-from tqdm import tqdm
-from config import driver, DIMENSION
+from config import driver, DIMENSION, EMBED_BATCH_SIZE, EMBED_WORKERS, CHECKPOINT_FILE
 from groq_embedder import Embedder
+from corpus import iter_surah_info, iter_verses
+from ingest_pipeline import IngestPipeline
+from graph_writer import (
+    BulkGraphWriter, ensure_schema, load_content_hashes, backfill_text_normalized, bump_content_version
+)
+from arabic_text import normalize_arabic
 
 def chunk_text(text, max_tokens=512, overlap=50):
     words = text.split()
@@ -34,94 +41,183 @@ def flatten_embeddings(embeddings):
     avg_embedding = np.mean(embeddings, axis=0).tolist()
     return validate_embedding(avg_embedding)  # Pastikan tetap 768 dimensi
 
-def insert_quran_data():
-    with open("quran.json", "r", encoding="utf-8") as file:
-        quran_data = json.load(file)
+def embed_documents(texts, pool=None, batch_size=EMBED_BATCH_SIZE):
+    """Embed banyak dokumen sekaligus.
+
+    Semua chunk dari semua dokumen di-encode dalam batch besar, lalu vektor
+    dikembalikan ke dokumen asalnya dan dirata-rata dengan flatten_embeddings.
+    """
+    if not texts:
+        return []
+
+    chunks = []
+    owners = []  # Indeks dokumen pemilik tiap chunk
+    for doc_idx, text in enumerate(texts):
+        for chunk in chunk_text(text):
+            chunks.append(chunk)
+            owners.append(doc_idx)
+
+    vectors = Embedder.embed_batch(chunks, batch_size=batch_size, pool=pool)
+
+    grouped = [[] for _ in texts]
+    for owner, vector in zip(owners, vectors):
+        grouped[owner].append(vector)
+
+    return [flatten_embeddings(doc_vectors) for doc_vectors in grouped]
+
+def build_surah_text(surah):
+    return f"Surah {surah.name} ({surah.name_latin}), jumlah ayat {surah.number_of_ayah}"
+
+def build_ayah_text(surah_name, ayah_num, ayah_text, translation, tafsir):
+    # Format teks yang akan di-embed (termasuk nomor ayat)
+    return f"Surah {surah_name} Ayat {ayah_num}: {ayah_text} | Terjemahan: {translation} | Tafsir: {tafsir}"
+
+def content_hash(*fields):
+    """Hash isi node; berubah hanya jika salah satu field berubah"""
+    digest = hashlib.sha256()
+    for field in fields:
+        digest.update(str(field).encode("utf-8"))
+        digest.update(b"\x1f")  # Pemisah antar field
+    return digest.hexdigest()
+
+def surah_content_hash(surah):
+    return content_hash(surah.name, surah.name_latin, surah.number_of_ayah)
+
+def iter_ayah_rows(verses):
+    """Hasilkan data setiap ayat beserta teks yang akan di-embed"""
+    for verse in verses:
+        yield {
+            "checkpoint_id": f"{verse.surah_id}-{verse.number}",
+            "surah_number": verse.surah_number,
+            "number": verse.number,
+            "text": verse.text,
+            "text_normalized": normalize_arabic(verse.text),
+            "translation": verse.translation,
+            "tafsir": verse.tafsir,
+            "content_hash": content_hash(verse.surah_name, verse.text, verse.translation, verse.tafsir),
+            "embed_text": build_ayah_text(verse.surah_name, verse.number, verse.text, verse.translation, verse.tafsir)
+        }
+
+def iter_batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+CHECKPOINT_HEADER = "# insert_data mode={mode}"
+
+def load_checkpoint(mode):
+    """Id ayat (format `<oid surah>-<nomor ayat>`) yang sudah commit pada run `mode` yang terhenti.
+
+    Checkpoint dari mode lain atau tanpa header dianggap basi: dihapus dan
+    run dimulai dari awal, bukan dilanjutkan diam-diam.
+    """
+    if not os.path.exists(CHECKPOINT_FILE):
+        return set()
+    with open(CHECKPOINT_FILE, "r", encoding="utf-8") as file:
+        lines = [line.strip() for line in file if line.strip()]
+    if not lines or lines[0] != CHECKPOINT_HEADER.format(mode=mode):
+        print(f"🧹 Checkpoint {CHECKPOINT_FILE} bukan dari run '{mode}' yang terhenti, diabaikan")
+        clear_checkpoint()
+        return set()
+    return set(lines[1:])
+
+def start_checkpoint(mode):
+    with open(CHECKPOINT_FILE, "w", encoding="utf-8") as file:
+        file.write(CHECKPOINT_HEADER.format(mode=mode) + "\n")
+
+def append_checkpoint(rows):
+    with open(CHECKPOINT_FILE, "a", encoding="utf-8") as file:
+        for row in rows:
+            file.write(f"{row['checkpoint_id']}\n")
+
+def clear_checkpoint():
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+def insert_quran_data(full=False):
+    """Masukkan data Al-Quran ke Neo4j.
+
+    Mode default bersifat inkremental: hanya Surah/Ayat yang content_hash-nya
+    berubah (atau belum ada) yang di-embed ulang dan di-upsert, sehingga relasi
+    RELATED_TO dan SemanticNode tidak ikut terhapus. `full=True` menghapus
+    seluruh graph lalu membangunnya ulang.
+
+    Setiap batch yang commit dicatat di CHECKPOINT_FILE. Jika run terhenti,
+    run berikutnya dengan mode yang sama melanjutkan dari sana (tanpa
+    menghapus graph lagi); file checkpoint dihapus setelah run selesai.
+    """
+    # Korpus dibaca streaming: metadata surah dulu, lalu ayat secara lazy
+    surahs = list(iter_surah_info())
+    mode = "full" if full else "incremental"
+    checkpoint = load_checkpoint(mode)
+    
+    # Worker multi-proses hanya dibuat jika diminta di config
+    pool = Embedder.start_pool(EMBED_WORKERS) if EMBED_WORKERS > 1 else None
     
     try:
-        with driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")  # Hapus semua data sebelumnya
-            session.run("CREATE (:Quran {name: 'Al-Quran'})")  # Buat root node Al-Quran
+        if full and not checkpoint:
+            with driver.session() as session:
+                session.run("MATCH (n) DETACH DELETE n")  # Hapus semua data sebelumnya
+        elif checkpoint:
+            print(f"↩️ Melanjutkan dari checkpoint ({len(checkpoint)} ayat sudah diproses)")
+        if not checkpoint:
+            start_checkpoint(mode)
+        ensure_schema(driver)
+        backfill_text_normalized(driver)
+        surah_hashes, ayat_hashes = load_content_hashes(driver)
+        
+        changed_surahs = [
+            surah for surah in surahs
+            if surah_hashes.get(surah.number) != surah_content_hash(surah)
+        ]
+        print(f"Surah berubah: {len(changed_surahs)}")
+        
+        def is_changed(row):
+            # Ayat dilewati jika isinya sama dengan di graph, atau sudah commit sebelum crash
+            key = (row["surah_number"], row["number"])
+            if row["checkpoint_id"] in checkpoint and key in ayat_hashes:
+                return False
+            return ayat_hashes.get(key) != row["content_hash"]
+        
+        with BulkGraphWriter(driver, on_commit=append_checkpoint) as writer:
+            # Semua surah di-embed dalam satu batch
+            surah_embeddings = embed_documents([build_surah_text(surah) for surah in changed_surahs], pool=pool)
             
-            total_ayat = sum(len(surah["text"]) for surah in quran_data)
-            progress_bar = tqdm(total=total_ayat, desc="Memproses Ayat")
+            for surah, surah_embedding in zip(changed_surahs, surah_embeddings):
+                writer.add_surah({
+                    "number": surah.number,
+                    "name": surah.name,
+                    "name_latin": surah.name_latin,
+                    "number_of_ayah": surah.number_of_ayah,
+                    "embedding": surah_embedding,
+                    "content_hash": surah_content_hash(surah)
+                })
             
-            for surah in quran_data:
-                surah_id = int(surah["number"])
-                surah_name = surah["name"]
-                surah_name_latin = surah["name_latin"]
-                number_of_ayah = int(surah["number_of_ayah"])
-                
-                surah_text = f"Surah {surah_name} ({surah_name_latin}), jumlah ayat {number_of_ayah}"
-                surah_chunks = chunk_text(surah_text)
-                surah_embeddings = [Embedder.embed_text(chunk) for chunk in surah_chunks]
-                
-                # Ambil rata-rata embedding agar sesuai format yang diterima Neo4j
-                flattened_surah_embedding = flatten_embeddings(surah_embeddings)
-                
-                session.run(
-                    """MATCH (q:Quran {name: 'Al-Quran'})
-                        CREATE (s:Surah {
-                            number: $number,
-                            name: $name,
-                            name_latin: $name_latin,
-                            number_of_ayah: $number_of_ayah,
-                            embedding: $embedding
-                        })
-                        CREATE (q)-[:HAS_SURAH]->(s)
-                    """,
-                    {
-                        "number": surah_id,
-                        "name": surah_name,
-                        "name_latin": surah_name_latin,
-                        "number_of_ayah": number_of_ayah,
-                        "embedding": flattened_surah_embedding
-                    }
-                )
-                
-                for ayah_num, ayah_text in surah["text"].items():
-                    translation = surah.get("translations", {}).get("id", {}).get("text", {}).get(ayah_num, "")
-                    tafsir = surah.get("tafsir", {}).get("id", {}).get("kemenag", {}).get("text", {}).get(ayah_num, "")
-
-                    # Format teks yang akan di-embed (termasuk nomor ayat)
-                    combined_text = f"Surah {surah_name} Ayat {ayah_num}: {ayah_text} | Terjemahan: {translation} | Tafsir: {tafsir}"
-                    
-                    ayah_chunks = chunk_text(combined_text)
-                    ayah_embeddings = [Embedder.embed_text(chunk) for chunk in ayah_chunks]
-                    
-                    # Ambil rata-rata embedding agar sesuai format yang diterima Neo4j
-                    flattened_ayah_embedding = flatten_embeddings(ayah_embeddings)
-                    
-                    session.run(
-                        """MATCH (s:Surah {number: $surah_number})
-                            CREATE (a:Ayat {
-                                number: $number,
-                                text: $text,
-                                translation: $translation,
-                                tafsir: $tafsir,
-                                embedding: $embedding
-                            })
-                            CREATE (s)-[:HAS_AYAT]->(a)
-                        """,
-                        {
-                            "surah_number": surah_id,
-                            "number": int(ayah_num),
-                            "text": ayah_text,
-                            "translation": translation,
-                            "tafsir": tafsir,
-                            "embedding": flattened_ayah_embedding
-                        }
-                    )
-                    
-                    progress_bar.update(1)
+            # Baca, embed, dan tulis ayat berjalan bersamaan lewat antrian terbatas
+            changed_rows = (row for row in iter_ayah_rows(iter_verses()) if is_changed(row))
+            pipeline = IngestPipeline(writer, lambda texts: embed_documents(texts, pool=pool))
+            written = pipeline.run(changed_rows)
             
-            progress_bar.close()
-            print("✅ Data berhasil dimasukkan!")
+        print(f"Ayat berubah: {written}")
+        if changed_surahs or written:
+            bump_content_version(driver)  # Cache jawaban di aplikasi akan dikosongkan
+        clear_checkpoint()
+        print("✅ Data berhasil dimasukkan!")
     
     except Exception as e:
         print(f"❌ Error: {str(e)}")
     finally:
+        if pool is not None:
+            Embedder.stop_pool(pool)
         driver.close()
 
 if __name__ == "__main__":
-    insert_quran_data()
+    parser = argparse.ArgumentParser(description="Masukkan data Al-Quran ke Neo4j")
+    parser.add_argument("--full", action="store_true", help="Hapus seluruh graph lalu bangun ulang dari awal")
+    args = parser.parse_args()
+    insert_quran_data(full=args.full)
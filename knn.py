@@ -1,117 +1,179 @@
+import argparse
 import json
+import os
 import numpy as np
 from neo4j import GraphDatabase
 from tqdm import tqdm
-from config import driver, DIMENSION
+from config import driver, DIMENSION, KNN_MEMORY_CAP_BYTES, KNN_RECALL_SAMPLE, SIMILARITY_GRAPH_PATH
 from groq_embedder import Embedder
-from sklearn.metrics.pairwise import cosine_similarity
+from graph_writer import (
+    RelationWriter,
+    delete_relations_between,
+    delete_relations_of,
+    ensure_schema,
+    load_knn_stale_keys,
+    load_related_neighbors,
+    mark_knn_current
+)
+from similarity_graph import SimilarityGraph
+from knn_engine import block_rows_for, iter_knn_blocks, make_index, normalize_rows, recall_at_k
 import time
 
 class QuranRelator:
-    def __init__(self, driver, threshold=0.75, k=10):
+    def __init__(self, driver, threshold=0.75, k=10, backend="exact", backend_options=None, recall_sample=KNN_RECALL_SAMPLE,
+                 symmetric=False, csr_path=SIMILARITY_GRAPH_PATH):
         self.driver = driver
         self.threshold = threshold
         self.k = k  # Jumlah tetangga terdekat yang akan dihubungkan
-        self.ayat_embeddings = {}
-        self.ayat_data = []  # Untuk menyimpan data dalam format yang mudah diolah
+        self.backend = backend  # 'exact' atau 'ivf' (ANN, lihat knn_engine)
+        self.backend_options = backend_options or {}
+        self.recall_sample = recall_sample  # Jumlah ayat sampel untuk mengukur recall@k backend ANN
+        self.symmetric = symmetric  # Simpan satu relasi per pasangan ayat (bukan dua arah)
+        self.csr_path = csr_path  # Direktori ekspor graph CSR (None = tidak diekspor)
+        # Embedding disimpan sebagai satu matriks float32 + array kunci paralel
+        self.embeddings = np.empty((0, DIMENSION), dtype=np.float32)
+        self.surah_numbers = np.empty(0, dtype=np.int32)
+        self.ayah_numbers = np.empty(0, dtype=np.int32)
 
-    def load_embeddings(self):
-        """Ambil embedding semua ayat yang ada di database"""
+    def key(self, index):
+        """Kunci (nomor surah, nomor ayat) untuk baris ke-index"""
+        return int(self.surah_numbers[index]), int(self.ayah_numbers[index])
+
+    def load_embeddings(self, surah_range=None):
+        """Ambil embedding semua ayat yang ada di database.
+
+        Record dialirkan langsung ke matriks float32 yang sudah dialokasikan,
+        urut berdasarkan (nomor surah, nomor ayat). `surah_range` (awal, akhir)
+        membatasi ayat yang dimuat ke rentang surah tersebut (inklusif).
+        Return False jika gagal, agar pemanggil tidak lanjut menghapus relasi.
+        """
         try:
+            # Graph lama belum punya a.surah_number; migrasi di ensure_schema mengisinya
+            ensure_schema(self.driver)
+            first, last = surah_range or (None, None)
+            params = {"first": first, "last": last}
+            where = """
+                WHERE a.embedding IS NOT NULL
+                AND ($first IS NULL OR a.surah_number >= $first)
+                AND ($last IS NULL OR a.surah_number <= $last)
+            """
             with self.driver.session() as session:
-                query = """
-                    MATCH (s:Surah)-[:HAS_AYAT]->(a:Ayat)
-                    RETURN s.number AS surah_number, a.number AS ayah_number, a.embedding AS embedding
+                total = session.run(f"MATCH (a:Ayat) {where} RETURN count(a) AS total", params).single()["total"]
+                
+                embeddings = np.empty((total, DIMENSION), dtype=np.float32)
+                surah_numbers = np.empty(total, dtype=np.int32)
+                ayah_numbers = np.empty(total, dtype=np.int32)
+                
+                query = f"""
+                    MATCH (a:Ayat) {where}
+                    RETURN a.surah_number AS surah_number, a.number AS ayah_number, a.embedding AS embedding
+                    ORDER BY surah_number, ayah_number
                 """
-                result = session.run(query)
-                for record in result:
-                    surah_num = record["surah_number"]
-                    ayah_num = record["ayah_number"]
-                    embedding = record["embedding"]
-                    
-                    # Simpan embedding dalam dict untuk akses cepat
-                    self.ayat_embeddings[(surah_num, ayah_num)] = embedding
-                    
-                    # Simpan informasi dalam format array untuk komputasi batch
-                    self.ayat_data.append({
-                        'surah_number': surah_num,
-                        'ayah_number': ayah_num,
-                        'embedding': embedding
-                    })
+                count = 0
+                for record in session.run(query, params):
+                    if count == total:
+                        break  # Ada ayat baru setelah count(), abaikan
+                    embeddings[count] = record["embedding"]
+                    surah_numbers[count] = record["surah_number"]
+                    ayah_numbers[count] = record["ayah_number"]
+                    count += 1
+            
+            self.embeddings = embeddings[:count]
+            self.surah_numbers = surah_numbers[:count]
+            self.ayah_numbers = ayah_numbers[:count]
             
             print("✅ Embedding berhasil dimuat!")
-            print(f"Jumlah embedding yang dimuat: {len(self.ayat_embeddings)}")
+            print(f"Jumlah embedding yang dimuat: {count}")
+            return True
         except Exception as e:
             print(f"❌ Error saat memuat embedding: {str(e)}")
             import traceback
             traceback.print_exc()
+            return False
+
+    def iter_embedding_pages(self, page_size=1000):
+        """Telusuri embedding per halaman berdasarkan kunci (keyset pagination).
+
+        Menghasilkan (surah_numbers, ayah_numbers, embeddings) per halaman tanpa
+        menyimpan seluruh hasil di memori.
+        """
+        query = """
+            MATCH (a:Ayat)
+            WHERE a.embedding IS NOT NULL
+            AND (a.surah_number > $surah OR (a.surah_number = $surah AND a.number > $ayah))
+            RETURN a.surah_number AS surah_number, a.number AS ayah_number, a.embedding AS embedding
+            ORDER BY surah_number, ayah_number
+            LIMIT $page_size
+        """
+        ensure_schema(self.driver)  # Isi a.surah_number di graph lama sebelum paginasi
+        last_key = (0, 0)
+        with self.driver.session() as session:
+            while True:
+                records = list(session.run(query, surah=last_key[0], ayah=last_key[1], page_size=page_size))
+                if not records:
+                    return
+                yield (
+                    np.array([record["surah_number"] for record in records], dtype=np.int32),
+                    np.array([record["ayah_number"] for record in records], dtype=np.int32),
+                    np.array([record["embedding"] for record in records], dtype=np.float32)
+                )
+                last_key = (records[-1]["surah_number"], records[-1]["ayah_number"])
+
+    def batch_process_knn(self, batch_size=100, memory_cap_bytes=KNN_MEMORY_CAP_BYTES):
+        """Proses KNN dalam batch untuk menghemat memori.
 
-    def batch_process_knn(self, batch_size=100):
-        """Proses KNN dalam batch untuk menghemat memori"""
+        Embedding dinormalisasi ke float32 sekali, lalu tetangga dicari dengan
+        backend knn_engine: 'exact' menghitung similarity per blok `batch_size`
+        ayat (dibatasi `memory_cap_bytes`), 'ivf' hanya membandingkan ayat dalam
+        cluster terdekat dan melaporkan recall@k terhadap exact.
+        """
         try:
-            total_ayat = len(self.ayat_data)
+            total_ayat = len(self.embeddings)
             total_relations = 0
             start_time = time.time()
             
-            # Siapkan array numpy untuk semua embedding
-            all_embeddings = np.array([data['embedding'] for data in self.ayat_data])
+            # Siapkan matriks float32 ternormalisasi untuk semua embedding
+            all_embeddings = normalize_rows(self.embeddings, copy=False)
+            index = make_index(
+                self.backend, all_embeddings,
+                block_size=batch_size, memory_cap_bytes=memory_cap_bytes, **self.backend_options
+            )
+            if self.backend != "exact":
+                self.report_recall(index, all_embeddings, batch_size, memory_cap_bytes)
             
+            ensure_schema(self.driver)  # Index ayat_key untuk MATCH relasi
+            lists = {}  # Daftar tetangga per baris untuk ekspor CSR
+            progress_bar = tqdm(total=total_ayat, desc="Memproses Batch KNN", unit="ayat")
             with self.driver.session() as session:
+                writer = RelationWriter(session, symmetric=self.symmetric)
                 # Proses dalam batch untuk menghemat memori
-                for i in tqdm(range(0, total_ayat, batch_size), desc="Memproses Batch KNN"):
-                    end_idx = min(i + batch_size, total_ayat)
-                    batch_embeddings = all_embeddings[i:end_idx]
-                    
-                    # Hitung similarity matrix untuk batch saat ini dengan semua ayat
-                    # Ini menghitung similarity dari setiap ayat di batch dengan semua ayat di dataset
-                    similarity_matrix = cosine_similarity(batch_embeddings, all_embeddings)
-                    
-                    # Untuk setiap ayat dalam batch
-                    for batch_idx, sim_scores in enumerate(similarity_matrix):
-                        global_idx = i + batch_idx
-                        ayat1 = self.ayat_data[global_idx]
-                        
-                        # Dapatkan K tetangga terdekat
-                        # Urutkan berdasarkan similarity score
-                        # -1 karena kita tidak ingin memasukkan ayat itu sendiri (similarity=1.0)
-                        top_indices = np.argsort(sim_scores)[-self.k-1:-1][::-1]
+                for block_rows, neighbor_indices, neighbor_scores in index.iter_blocks(self.k):
+                    progress_bar.update(len(block_rows))
+                    # Untuk setiap ayat dalam batch (ayat itu sendiri sudah dikecualikan)
+                    for global_idx, top_indices, top_scores in zip(block_rows, neighbor_indices, neighbor_scores):
+                        key_1 = self.key(global_idx)
+                        row_neighbors = lists.setdefault(int(global_idx), {})
                         
-                        batch_relations = []
-                        for neighbor_idx in top_indices:
-                            # Skip jika itu adalah ayat yang sama
-                            if neighbor_idx == global_idx:
+                        for neighbor_idx, similarity in zip(top_indices, top_scores):
+                            # Kolom kosong dari backend ANN bernilai -1 / -inf
+                            if neighbor_idx < 0:
                                 continue
-                                
-                            ayat2 = self.ayat_data[neighbor_idx]
-                            similarity = sim_scores[neighbor_idx]
                             
                             # Hanya buat relasi jika di atas threshold
                             if similarity >= self.threshold:
-                                batch_relations.append({
-                                    "surah_number_1": ayat1['surah_number'],
-                                    "ayah_number_1": ayat1['ayah_number'],
-                                    "surah_number_2": ayat2['surah_number'],
-                                    "ayah_number_2": ayat2['ayah_number'],
-                                    "similarity": float(similarity)
-                                })
-                        
-                        # Buat relasi dalam batch untuk kinerja yang lebih baik
-                        if batch_relations:
-                            query = """
-                            UNWIND $batch AS relation
-                            MATCH (a:Ayat), (b:Ayat)
-                            WHERE a.number = relation.ayah_number_1 AND EXISTS {
-                                MATCH (s:Surah)-[:HAS_AYAT]->(a) WHERE s.number = relation.surah_number_1
-                            }
-                            AND b.number = relation.ayah_number_2 AND EXISTS {
-                                MATCH (s:Surah)-[:HAS_AYAT]->(b) WHERE s.number = relation.surah_number_2
-                            }
-                            MERGE (a)-[:RELATED_TO {similarity: relation.similarity}]->(b)
-                            MERGE (b)-[:RELATED_TO {similarity: relation.similarity}]->(a)
-                            """
-                            session.run(query, {"batch": batch_relations})
-                            total_relations += len(batch_relations) * 2  # x2 karena relasi timbal balik
+                                writer.add(key_1, self.key(neighbor_idx), similarity)
+                                row_neighbors[int(neighbor_idx)] = float(similarity)
+                    
+                    # Satu batch UNWIND per blok
+                    writer.flush()
                 
+                total_relations = writer.written
+                progress_bar.close()
+                mark_knn_current(session)  # Acuan untuk update_incremental berikutnya
+                
+                if self.csr_path:
+                    SimilarityGraph.from_neighbor_lists(self.surah_numbers, self.ayah_numbers, lists).save(self.csr_path)
+                    print(f"💾 Graph similarity CSR disimpan di {self.csr_path}/")
                 elapsed_time = time.time() - start_time
                 print(f"✅ Relasi KNN berhasil dibuat! Total relasi: {total_relations}")
                 print(f"Waktu yang dibutuhkan: {elapsed_time:.2f} detik")
@@ -121,6 +183,139 @@ class QuranRelator:
             import traceback
             traceback.print_exc()
 
+    def neighbor_lists(self, rows, memory_cap_bytes=KNN_MEMORY_CAP_BYTES):
+        """Tetangga exact di atas threshold: {baris: {baris tetangga: similarity}}"""
+        lists = {}
+        for block_rows, neighbor_indices, neighbor_scores in iter_knn_blocks(
+            self.embeddings, self.k, memory_cap_bytes=memory_cap_bytes, rows=np.asarray(sorted(rows), dtype=np.int64)
+        ):
+            for row, top_indices, top_scores in zip(block_rows, neighbor_indices, neighbor_scores):
+                lists[int(row)] = {
+                    int(neighbor): float(score)
+                    for neighbor, score in zip(top_indices, top_scores)
+                    if score >= self.threshold
+                }
+        return lists
+
+    def update_incremental(self, changed_keys=None, memory_cap_bytes=KNN_MEMORY_CAP_BYTES):
+        """Perbarui RELATED_TO hanya untuk ayat yang berubah, tanpa menghapus semua relasi.
+
+        changed_keys: kunci (surah, ayat) yang baru/berubah; default diambil dari
+        graph (ayat dengan knn_hash != content_hash, lihat insert_data.py).
+        Harus dipanggil setelah load_embeddings.
+
+        Relasi adalah gabungan daftar top-k tiap ayat. Yang dihitung ulang:
+        - daftar tetangga ayat yang berubah (relasi lamanya dihapus semua),
+        - daftar tetangga ayat lain yang bisa terpengaruh: similarity-nya dengan
+          ayat yang berubah >= threshold, atau saat ini terhubung dengannya.
+        Relasi lama ayat terpengaruh hanya dihapus jika tidak lagi ada di daftar
+        top-k salah satu ujungnya.
+        """
+        try:
+            start_time = time.time()
+            ensure_schema(self.driver)
+            with self.driver.session() as session:
+                if changed_keys is None:
+                    changed_keys = load_knn_stale_keys(session)
+                
+                row_of = {self.key(row): row for row in range(len(self.embeddings))}
+                changed = {row_of[key] for key in changed_keys if key in row_of}
+                if not changed:
+                    print("✅ Tidak ada ayat yang berubah, relasi KNN sudah terbaru")
+                    return
+                
+                normalize_rows(self.embeddings, copy=False)
+                changed_rows = np.asarray(sorted(changed), dtype=np.int64)
+                
+                # Ayat lain yang mungkin memasukkan ayat berubah ke top-k-nya
+                affected = np.zeros(len(self.embeddings), dtype=bool)
+                step = block_rows_for(len(self.embeddings), 1024, memory_cap_bytes)
+                for start in range(0, len(changed_rows), step):
+                    similarities = self.embeddings[changed_rows[start:start + step]] @ self.embeddings.T
+                    affected |= (similarities >= self.threshold).any(axis=0)
+                
+                # ... atau yang saat ini terhubung dengan ayat berubah
+                current = load_related_neighbors(session, [self.key(row) for row in changed_rows])
+                for neighbors in current.values():
+                    affected[[row_of[key] for key in neighbors if key in row_of]] = True
+                affected[changed_rows] = False
+                affected_rows = set(np.flatnonzero(affected).tolist())
+                
+                lists = self.neighbor_lists(changed | affected_rows, memory_cap_bytes)
+                
+                # Relasi lama ayat terpengaruh yang mungkin tidak berlaku lagi
+                stored = load_related_neighbors(session, [self.key(row) for row in sorted(affected_rows)])
+                candidates = {
+                    (row, row_of[key])
+                    for row in affected_rows
+                    for key in stored[self.key(row)]
+                    if key in row_of and row_of[key] not in changed and row_of[key] not in lists[row]
+                }
+                lists.update(self.neighbor_lists({other for _, other in candidates if other not in lists}, memory_cap_bytes))
+                stale_pairs = [
+                    (self.key(row), self.key(other))
+                    for row, other in candidates
+                    if row not in lists[other]
+                ]
+                
+                # Patch dalam transaksi kecil: hapus dulu, lalu tulis daftar baru
+                delete_relations_of(session, [self.key(row) for row in changed_rows])
+                delete_relations_between(session, stale_pairs)
+                writer = RelationWriter(session, symmetric=self.symmetric, batch_size=500)
+                for row in sorted(changed | affected_rows):
+                    for neighbor, similarity in lists[row].items():
+                        writer.add(self.key(row), self.key(neighbor), similarity)
+                writer.flush()
+                mark_knn_current(session, [self.key(row) for row in changed_rows])
+            
+            self.update_csr(lists)
+            
+            elapsed_time = time.time() - start_time
+            print(
+                f"✅ Relasi KNN diperbarui: {len(changed)} ayat berubah, {len(affected_rows)} ayat terpengaruh, "
+                f"{len(stale_pairs)} relasi lama dihapus, {writer.written} relasi ditulis"
+            )
+            print(f"Waktu yang dibutuhkan: {elapsed_time:.2f} detik")
+        except Exception as e:
+            print(f"❌ Error saat memperbarui relasi KNN: {str(e)}")
+            import traceback
+            traceback.print_exc()
+
+    def update_csr(self, lists):
+        """Ganti daftar tetangga baris-baris `lists` di graph CSR yang sudah diekspor"""
+        if not self.csr_path or not os.path.exists(self.csr_path):
+            return
+        
+        by_key = SimilarityGraph.load(self.csr_path, mmap=False).to_neighbor_lists()
+        for row, neighbors in lists.items():
+            by_key[self.key(row)] = {self.key(neighbor): score for neighbor, score in neighbors.items()}
+        
+        row_of = {self.key(row): row for row in range(len(self.embeddings))}
+        merged = {
+            row_of[key]: {row_of[neighbor]: score for neighbor, score in neighbors.items() if neighbor in row_of}
+            for key, neighbors in by_key.items()
+            if key in row_of
+        }
+        SimilarityGraph.from_neighbor_lists(self.surah_numbers, self.ayah_numbers, merged).save(self.csr_path)
+        print(f"💾 Graph similarity CSR diperbarui di {self.csr_path}/")
+
+    def report_recall(self, index, matrix, batch_size, memory_cap_bytes):
+        """Ukur recall@k backend ANN terhadap KNN exact pada sampel ayat"""
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(len(matrix), min(self.recall_sample, len(matrix)), replace=False))
+        
+        approx = {}
+        for block_rows, neighbor_indices, _ in index.iter_blocks(self.k, rows=sample):
+            approx.update(zip(block_rows.tolist(), neighbor_indices))
+        exact = {}
+        for block_rows, neighbor_indices, _ in iter_knn_blocks(matrix, self.k, batch_size, memory_cap_bytes, rows=sample):
+            exact.update(zip(block_rows.tolist(), neighbor_indices))
+        
+        rows = sample.tolist()
+        recall = recall_at_k([approx[row] for row in rows], [exact[row] for row in rows])
+        print(f"📏 Recall@{self.k} backend {self.backend}: {recall:.4f} ({len(rows)} ayat sampel)")
+        return recall
+
     def cleanup_old_relations(self):
         """Hapus relasi RELATED_TO yang lama sebelum membuat yang baru"""
         try:
@@ -134,7 +329,21 @@ class QuranRelator:
 # Main function to run the class methods
 if __name__ == "__main__":
     # Gunakan threshold yang lebih tinggi (0.75) dan batasi maksimal 10 tetangga terdekat
-    relator = QuranRelator(driver, threshold=0.75, k=10)
-    relator.load_embeddings()  # Memuat embedding ayat
-    relator.cleanup_old_relations()  # Hapus relasi lama
-    relator.batch_process_knn(batch_size=100)  # Buat relasi baru dengan metode batch
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bangun relasi RELATED_TO antar ayat dengan KNN")
+    parser.add_argument("--backend", choices=["exact", "ivf"], default="exact", help="Backend pencarian tetangga")
+    parser.add_argument("--n-probe", type=int, default=8, help="Jumlah cluster yang diperiksa (backend ivf)")
+    parser.add_argument("--symmetric", action="store_true", help="Simpan satu relasi RELATED_TO per pasangan ayat")
+    parser.add_argument("--incremental", action="store_true", help="Perbarui relasi hanya untuk ayat yang berubah")
+    args = parser.parse_args()
+    
+    backend_options = {"n_probe": args.n_probe} if args.backend == "ivf" else {}
+    relator = QuranRelator(driver, threshold=0.75, k=10, backend=args.backend, backend_options=backend_options,
+                           symmetric=args.symmetric)
+    if not relator.load_embeddings():  # Memuat embedding ayat
+        # Jangan hapus relasi lama jika embedding tidak termuat
+        raise SystemExit("❌ Embedding gagal dimuat, relasi RELATED_TO tidak diubah")
+    if args.incremental:
+        relator.update_incremental()  # Patch relasi untuk ayat yang berubah saja
+    else:
+        relator.cleanup_old_relations()  # Hapus relasi lama
+        relator.batch_process_knn(batch_size=100)  # Buat relasi baru dengan metode batch
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""Mesin KNN exact untuk embedding ayat.
+
+Embedding dinormalisasi sekali ke float32, lalu similarity kosinus dihitung
+per blok dengan perkalian matriks. Top-k tiap baris diambil dengan
+np.argpartition (O(N) per baris) alih-alih argsort penuh (O(N log N)).
+"""
+import numpy as np
+
+def normalize_rows(matrix, copy=True):
+    """Ubah matrix ke float32 dengan setiap baris bernorma 1 (baris nol dibiarkan nol).
+
+    copy=False menormalisasi di tempat jika matrix sudah berupa array float32.
+    """
+    matrix = np.array(matrix, dtype=np.float32) if copy else np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+def block_rows_for(n_rows, block_size, memory_cap_bytes=None):
+    """Jumlah baris query per blok agar matriks similarity (blok x n_rows float32) muat di memory_cap"""
+    if memory_cap_bytes:
+        block_size = min(block_size, max(1, memory_cap_bytes // (max(n_rows, 1) * 4)))
+    return max(1, block_size)
+
+def top_k(similarities, k, exclude=None):
+    """Top-k per baris dari matriks similarity, urut menurun.
+
+    exclude: indeks kolom per baris yang diabaikan (mis. ayat itu sendiri).
+    Return (indices, scores) berukuran (baris, k).
+    """
+    if exclude is not None:
+        similarities[np.arange(len(similarities)), exclude] = -np.inf
+    k = min(k, similarities.shape[1] - (1 if exclude is not None else 0))
+    if k <= 0:
+        empty = np.empty((len(similarities), 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    
+    candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+def iter_knn_blocks(matrix, k, block_size=1024, memory_cap_bytes=None, rows=None):
+    """Hitung KNN exact per blok.
+
+    matrix: embedding yang sudah dinormalisasi (normalize_rows).
+    rows: indeks baris yang dicari tetangganya (default semua baris).
+    Menghasilkan (row_indices, neighbor_indices, scores) untuk tiap blok.
+    """
+    rows = np.arange(len(matrix)) if rows is None else np.asarray(rows)
+    step = block_rows_for(len(matrix), block_size, memory_cap_bytes)
+    for start in range(0, len(rows), step):
+        block_rows = rows[start:start + step]
+        similarities = matrix[block_rows] @ matrix.T
+        indices, scores = top_k(similarities, k, exclude=block_rows)
+        yield block_rows, indices, scores
+
+class ExactIndex:
+    """Backend KNN exact (semua pasangan), dipakai sebagai acuan recall"""
+
+    def __init__(self, matrix, block_size=1024, memory_cap_bytes=None):
+        self.matrix = matrix
+        self.block_size = block_size
+        self.memory_cap_bytes = memory_cap_bytes
+
+    def iter_blocks(self, k, rows=None):
+        return iter_knn_blocks(self.matrix, k, self.block_size, self.memory_cap_bytes, rows)
+
+class IVFIndex:
+    """Backend ANN inverted-file (IVF) berbasis NumPy.
+
+    Embedding dikelompokkan dengan spherical k-means ke `n_lists` cluster.
+    Setiap query hanya dibandingkan dengan anggota `n_probe` cluster terdekat,
+    sehingga biaya per query ~ N * n_probe / n_lists, bukan N.
+    """
+
+    def __init__(self, matrix, n_lists=None, n_probe=8, n_iter=10, seed=0,
+                 block_size=1024, memory_cap_bytes=None):
+        self.matrix = matrix
+        self.n_lists = min(len(matrix), n_lists or max(1, int(4 * np.sqrt(len(matrix)))))
+        self.n_probe = min(n_probe, self.n_lists)
+        self.block_size = block_size
+        self.memory_cap_bytes = memory_cap_bytes
+        self.centroids = self._train(n_iter, np.random.default_rng(seed))
+        self.assignments = self._nearest_centroids(matrix, 1)[:, 0]
+        
+        order = np.argsort(self.assignments, kind="stable")
+        offsets = np.searchsorted(self.assignments[order], np.arange(self.n_lists + 1))
+        self.lists = [order[offsets[i]:offsets[i + 1]] for i in range(self.n_lists)]
+
+    def _nearest_centroids(self, vectors, count):
+        nearest = []
+        step = block_rows_for(self.n_lists, self.block_size * 16, self.memory_cap_bytes)
+        for start in range(0, len(vectors), step):
+            similarities = vectors[start:start + step] @ self.centroids.T
+            if count == 1:
+                nearest.append(similarities.argmax(axis=1)[:, None])
+            else:
+                nearest.append(top_k(similarities, count)[0])
+        return np.concatenate(nearest) if nearest else np.empty((0, count), dtype=np.int64)
+
+    def _train(self, n_iter, rng):
+        # k-means cukup dilatih pada sampel (~40 ayat per cluster)
+        sample_size = min(len(self.matrix), 40 * self.n_lists)
+        sample = self.matrix[rng.choice(len(self.matrix), sample_size, replace=False)]
+        self.centroids = sample[:self.n_lists].copy()
+        for _ in range(n_iter):
+            assignments = self._nearest_centroids(sample, 1)[:, 0]
+            counts = np.bincount(assignments, minlength=self.n_lists)
+            order = np.argsort(assignments, kind="stable")
+            sums = np.zeros_like(self.centroids)
+            filled = counts > 0
+            sums[filled] = np.add.reduceat(sample[order], np.cumsum(counts)[filled] - counts[filled])
+            # Cluster kosong diisi ulang dengan ayat acak
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            self.centroids = normalize_rows(sums)
+        return self.centroids
+
+    def iter_blocks(self, k, rows=None):
+        """Sama seperti ExactIndex.iter_blocks; kolom yang kosong berisi indeks -1 dan skor -inf"""
+        rows = np.arange(len(self.matrix)) if rows is None else np.asarray(rows)
+        probes = self._nearest_centroids(self.matrix[rows], self.n_probe)
+        
+        # Query dengan cluster utama yang sama diproses bersama: kandidatnya hampir sama
+        order = np.argsort(probes[:, 0], kind="stable")
+        boundaries = np.flatnonzero(np.diff(probes[order, 0])) + 1
+        for group in np.split(order, boundaries):
+            group_probes = probes[group]
+            candidate_lists = np.unique(group_probes)
+            candidates = np.concatenate([self.lists[i] for i in candidate_lists])
+            candidate_cluster = self.assignments[candidates]
+            
+            step = block_rows_for(len(candidates) * (self.n_probe + 1), self.block_size, self.memory_cap_bytes)
+            for start in range(0, len(group), step):
+                block = group[start:start + step]
+                block_rows = rows[block]
+                similarities = self.matrix[block_rows] @ self.matrix[candidates].T
+                # Abaikan kandidat di luar n_probe cluster milik tiap query, dan ayat itu sendiri
+                allowed = (candidate_cluster[None, None, :] == group_probes[start:start + step, :, None]).any(axis=1)
+                similarities[~allowed] = -np.inf
+                similarities[candidates[None, :] == block_rows[:, None]] = -np.inf
+                
+                indices, scores = top_k(similarities, k)
+                indices = candidates[indices]
+                if indices.shape[1] < k:
+                    pad = k - indices.shape[1]
+                    indices = np.pad(indices, ((0, 0), (0, pad)), constant_values=-1)
+                    scores = np.pad(scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+                indices[~np.isfinite(scores)] = -1
+                yield block_rows, indices, scores
+
+def recall_at_k(approx_indices, exact_indices):
+    """Rata-rata proporsi tetangga exact yang juga ditemukan oleh backend ANN"""
+    hits = 0
+    total = 0
+    for approx, exact in zip(approx_indices, exact_indices):
+        exact = set(exact[exact >= 0].tolist())
+        hits += len(exact & set(approx[approx >= 0].tolist()))
+        total += len(exact)
+    return hits / total if total else 1.0
+
+def make_index(backend, matrix, **options):
+    """Buat backend KNN: 'exact' atau 'ivf'"""
+    if backend == "exact":
+        options = {key: value for key, value in options.items() if key in ("block_size", "memory_cap_bytes")}
+        return ExactIndex(matrix, **options)
+    if backend == "ivf":
+        return IVFIndex(matrix, **options)
+    raise ValueError(f"Backend KNN tidak dikenal: {backend}")
@@ -0,0 +1,180 @@
+"""Klien HTTP bersama untuk semua panggilan ke API chat completions Groq.
+
+Satu httpx.Client (sync) dan satu httpx.AsyncClient per event loop dipakai
+ulang antar panggilan, sehingga koneksi TLS tetap hidup (keep-alive) dan
+tidak ada handshake baru di setiap request. Method async benar-benar
+non-blocking; method sync adalah facade untuk script dan Streamlit.
+Alamat API diambil dari GROQ_BASE_URL agar bisa diarahkan ke mock_llm_server.py.
+"""
+import asyncio
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+import httpx
+from config import GROQ_BASE_URL, LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_MAX_CONNECTIONS
+
+class LLMError(Exception):
+    """Respons non-200 dari API; status_code dan body disimpan untuk penanganan (mis. 429)"""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Error dari Groq: {status_code}, {body}")
+        self.status_code = status_code
+        self.body = body
+
+    def json(self) -> Dict:
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return {}
+
+def content_of(response_data: Dict) -> str:
+    if "choices" not in response_data:
+        raise ValueError(f"Struktur respons tidak valid: {response_data}")
+    return response_data["choices"][0]["message"]["content"]
+
+_DONE = object()
+
+def _parse_sse_line(line: str):
+    if not line or not line.startswith("data:"):
+        return None  # Baris kosong pemisah event / komentar keep-alive
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return _DONE
+    chunk = json.loads(data)
+    if "error" in chunk:
+        raise LLMError(200, json.dumps(chunk["error"]))
+    return "".join(
+        choice.get("delta", {}).get("content") or ""
+        for choice in chunk.get("choices", [])
+    )
+
+def iter_sse_deltas(lines: Iterable[str]) -> Iterator[str]:
+    """Ambil potongan teks dari baris server-sent events chat completions"""
+    for line in lines:
+        content = _parse_sse_line(line)
+        if content is _DONE:
+            return
+        if content:
+            yield content
+
+class LLMClient:
+    def __init__(self, api_key: Optional[str] = None, base_url: str = GROQ_BASE_URL,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT, read_timeout: float = LLM_READ_TIMEOUT,
+                 max_connections: int = LLM_MAX_CONNECTIONS):
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._client: Optional[httpx.Client] = None
+        self._async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    def _options(self) -> Dict:
+        return {
+            "base_url": self.base_url,
+            "headers": {"Authorization": f"Bearer {self.api_key}"},
+            "timeout": self.timeout,
+            "limits": self.limits,
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._options())
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Koneksi AsyncClient terikat ke event loop pembuatnya
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for stale_loop in [other for other in self._async_clients if other.is_closed()]:
+                del self._async_clients[stale_loop]
+            if loop not in self._async_clients:
+                self._async_clients[loop] = httpx.AsyncClient(**self._options())
+            return self._async_clients[loop]
+
+    @staticmethod
+    def payload(prompt: str, model: str, temperature: float = 0.3, max_tokens: int = 5000,
+                stream: bool = False) -> Dict:
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+    @staticmethod
+    def _check(response: httpx.Response):
+        if response.status_code != 200:
+            raise LLMError(response.status_code, response.text)
+
+    # --- Sync facade ---
+
+    def list_models(self) -> List[Dict]:
+        response = self.client.get("/models")
+        self._check(response)
+        return response.json().get("data", [])
+
+    def chat(self, prompt: str, model: str, **options) -> Dict:
+        """Respons JSON lengkap (termasuk usage); teks jawaban lewat content_of"""
+        response = self.client.post("/chat/completions", json=self.payload(prompt, model, **options))
+        self._check(response)
+        return response.json()
+
+    def stream_chat(self, prompt: str, model: str, **options) -> Iterator[str]:
+        with self.client.stream(
+            "POST", "/chat/completions", json=self.payload(prompt, model, stream=True, **options)
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                self._check(response)
+            yield from iter_sse_deltas(response.iter_lines())
+
+    # --- Async ---
+
+    async def alist_models(self) -> List[Dict]:
+        response = await self.async_client.get("/models")
+        self._check(response)
+        return response.json().get("data", [])
+
+    async def achat(self, prompt: str, model: str, **options) -> Dict:
+        response = await self.async_client.post("/chat/completions", json=self.payload(prompt, model, **options))
+        self._check(response)
+        return response.json()
+
+    async def astream_chat(self, prompt: str, model: str, **options) -> AsyncIterator[str]:
+        async with self.async_client.stream(
+            "POST", "/chat/completions", json=self.payload(prompt, model, stream=True, **options)
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._check(response)
+            async for line in response.aiter_lines():
+                content = _parse_sse_line(line)
+                if content is _DONE:
+                    return
+                if content:
+                    yield content
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+@lru_cache(maxsize=None)
+def get_llm_client(api_key: Optional[str] = None) -> LLMClient:
+    """Klien bersama per API key untuk seluruh proses"""
+    return LLMClient(api_key=api_key)
@@ -1,32 +1,15 @@
-import requests
+from llm_client import content_of, get_llm_client
 
 class GroqLLM:
     def __init__(self, api_key, model):
         self.api_key = api_key
         self.model = model
+        self.client = get_llm_client(api_key)
 
     async def invoke(self, prompt: str) -> str:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": self.model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,
-                "max_tokens": 500,
-            },
-        )
-
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            raise Exception(
-                f"Error dari Groq: {response.status_code}, {response.text}"
-            )
+        # Non-blocking: request berjalan di event loop lewat AsyncClient yang di-pool
+        result = await self.client.achat(prompt, self.model, temperature=0.7, max_tokens=500)
+        return content_of(result)
 
 
 # Konfigurasi LLM
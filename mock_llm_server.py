@@ -0,0 +1,123 @@
+"""Server mock API chat completions (kompatibel OpenAI/Groq) untuk uji lokal.
+
+Hanya memakai library standar. Jalankan lalu arahkan klien ke sini:
+
+    python mock_llm_server.py --port 8001 --token-delay 0.02
+    GROQ_BASE_URL=http://127.0.0.1:8001 streamlit run app.py
+
+Mendukung GET /models, POST /chat/completions (biasa dan stream=true), serta
+simulasi latensi dan rate limit (429) dengan format pesan seperti Groq.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, agar pooling koneksi klien ikut teruji
+    latency = 0.0  # Detik sebelum respons pertama
+    token_delay = 0.0  # Detik antar token saat streaming
+    rate_limit_every = 0  # Setiap request ke-N dijawab 429 (0 = tidak pernah)
+    request_count = 0
+    count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass  # Jangan penuhi terminal dengan log per request
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        
+        with self.count_lock:
+            MockLLMHandler.request_count += 1
+            count = MockLLMHandler.request_count
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            self._send_json(429, {"error": {"message": "Rate limit reached. Please try again in 0.5s. (mock)"}})
+            return
+        
+        time.sleep(self.latency)
+        tokens = mock_answer_tokens(request)
+        if request.get("stream"):
+            self._stream(request, tokens)
+        else:
+            content = "".join(tokens)
+            self._send_json(200, {
+                "id": f"mock-{count}",
+                "object": "chat.completion",
+                "model": request.get("model", "mock-model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens(request), "completion_tokens": len(tokens),
+                          "total_tokens": prompt_tokens(request) + len(tokens)}
+            })
+
+    def _stream(self, request, tokens):
+        # Tanpa Content-Length: koneksi ditutup setelah event terakhir
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for token in tokens:
+            chunk = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": token}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+def prompt_tokens(request):
+    return sum(len(str(message.get("content", "")).split()) for message in request.get("messages", []))
+
+def mock_answer_tokens(request):
+    """Jawaban deterministik: potongan pertanyaan terakhir, dipecah per kata"""
+    messages = request.get("messages") or [{"content": ""}]
+    question = " ".join(str(messages[-1].get("content", "")).split()[-12:])
+    answer = f"Jawaban mock ({request.get('model', 'mock-model')}) untuk: {question}"
+    words = answer.split(" ")
+    return [word if index == 0 else " " + word for index, word in enumerate(words)]
+
+def start_mock_server(port=0, latency=0.0, token_delay=0.0, rate_limit_every=0):
+    """Jalankan server di thread latar; return (server, base_url). Hentikan dengan server.shutdown()"""
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {
+        "latency": latency, "token_delay": token_delay, "rate_limit_every": rate_limit_every
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock API chat completions untuk uji lokal")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="Detik sebelum respons pertama")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Detik antar token saat streaming")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Jawab 429 setiap request ke-N")
+    args = parser.parse_args()
+    
+    server, base_url = start_mock_server(args.port, args.latency, args.token_delay, args.rate_limit_every)
+    print(f"🧪 Mock LLM berjalan di {base_url} (set GROQ_BASE_URL={base_url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,81 @@
+"""Resource jangka panjang milik proses: driver Neo4j, embedder, klien LLM, VerseStore.
+
+Dibuat sekali per proses dan dipakai bersama oleh app.py (lintas rerun
+Streamlit) dan search.main. Konektivitas Neo4j dan Groq dicek sekali saat
+start, lalu diperbarui di thread latar setiap RESOURCE_HEALTH_INTERVAL
+detik, sehingga giliran chat tidak membayar reconnect atau request /models.
+"""
+import atexit
+import os
+import threading
+import time
+from typing import Dict, Optional
+from neo4j_graphrag.retrievers import VectorRetriever
+from config import driver, INDEX_NAME, RESOURCE_HEALTH_INTERVAL
+from groq_embedder import Embedder
+from llm_client import get_llm_client
+from verse_store import get_verse_store
+
+DEFAULT_GROQ_MODEL = "llama-3.3-70b-versatile"
+
+class Resources:
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_GROQ_MODEL,
+                 health_interval: float = RESOURCE_HEALTH_INTERVAL):
+        self.groq_api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.groq_model = model
+        self.driver = driver  # Driver sudah memegang pool koneksi sendiri
+        self.embedder = Embedder
+        self.llm = get_llm_client(self.groq_api_key)
+        self.verse_store = get_verse_store()
+        self.retriever = VectorRetriever(
+            driver=self.driver,
+            index_name=INDEX_NAME,
+            embedder=self.embedder,
+            return_properties=["id", "text", "surah", "ayat_number"]
+        )
+        self.health: Dict[str, object] = {"neo4j": False, "llm": False, "checked_at": None}
+        self.check_health()
+
+        self._stop = threading.Event()
+        self._monitor = threading.Thread(target=self._monitor_health, args=(health_interval,), daemon=True)
+        self._monitor.start()
+
+    def check_health(self) -> Dict[str, object]:
+        health = {"neo4j": False, "llm": False, "checked_at": time.time()}
+        try:
+            self.driver.verify_connectivity()
+            health["neo4j"] = True
+        except Exception as e:
+            print(f"❌ Neo4j tidak dapat dihubungi: {str(e)}")
+        try:
+            self.llm.list_models()
+            health["llm"] = True
+        except Exception as e:
+            print(f"❌ Gagal terhubung ke Groq: {str(e)}")
+        self.health = health
+        return health
+
+    @property
+    def healthy(self) -> bool:
+        return bool(self.health["neo4j"] and self.health["llm"])
+
+    def _monitor_health(self, interval: float):
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def close(self):
+        self._stop.set()
+        self.llm.close()
+        self.driver.close()
+
+_resources: Optional[Resources] = None
+_lock = threading.Lock()
+
+def get_resources() -> Resources:
+    """Resources milik proses; dibuat saat pertama kali diminta, ditutup saat proses keluar"""
+    global _resources
+    with _lock:
+        if _resources is None:
+            _resources = Resources()
+            atexit.register(_resources.close)
+        return _resources
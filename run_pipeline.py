@@ -3,19 +3,34 @@ import json
 import asyncio
 from langchain_neo4j import Neo4jGraph
 import re
-import requests
 import time
+from itertools import groupby
+from operator import attrgetter
 from datetime import datetime, timedelta
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from config import EMBEDDING_CACHE_DIR
+from embedding_cache import EmbeddingCache
+from corpus import iter_verses
+from llm_client import LLMError, content_of, get_llm_client
 
 
 class EmbeddingGenerator:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', use_cache: bool = True):
         self.model = SentenceTransformer(model_name)
+        self.cache = None
+        if use_cache and EMBEDDING_CACHE_DIR:
+            self.cache = EmbeddingCache(model_name, self.model.get_sentence_embedding_dimension())
     
     def generate_embedding(self, text: str) -> List[float]:
-        return self.model.encode(text).tolist()
+        if self.cache is None:
+            return self.model.encode(text).tolist()
+        
+        cached = self.cache.get_many([text])[0]
+        if cached is None:
+            cached = self.model.encode(text)
+            self.cache.put_many([text], [cached])
+        return np.asarray(cached, dtype=np.float32).tolist()
     
 class GroqLLM:
     def __init__(self, api_key: str, model: str, max_retries: int = 3):
@@ -27,6 +42,7 @@ class GroqLLM:
         self.token_usage = 0
         self.token_limit = 6000  # Token per minute limit
         self.reset_time = None
+        self.client = get_llm_client(api_key)  # Koneksi di-pool dan dipakai ulang antar request
 
     async def invoke(self, prompt: str) -> str:
         retry_count = 0
@@ -36,39 +52,25 @@ class GroqLLM:
                 # Check if we need to wait before making another request
                 await self._handle_rate_limit()
                 
-                response = requests.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.3,
-                        "max_tokens": 2000,
-                    },
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    # Update token usage
-                    usage = result.get("usage", {})
-                    self.token_usage += usage.get("total_tokens", 0)
-                    self.requests_this_minute += 1
-                    self.last_request_time = datetime.now()
-                    return result["choices"][0]["message"]["content"]
-                
-                elif response.status_code == 429:  # Rate limit exceeded
-                    error_data = response.json()
+                try:
+                    result = await self.client.achat(prompt, self.model, temperature=0.3, max_tokens=2000)
+                except LLMError as e:
+                    if e.status_code != 429:
+                        raise  # Error lain di-retry dengan exponential backoff di bawah
+                    # Rate limit exceeded
+                    error_data = e.json()
                     wait_time = float(error_data["error"]["message"].split("try again in ")[1].split("s")[0])
                     print(f"Rate limit reached. Waiting for {wait_time} seconds...")
                     await asyncio.sleep(wait_time + 1)  # Add 1 second buffer
                     retry_count += 1
                     continue
-                
-                else:
-                    raise Exception(f"Error from Groq: {response.status_code}, {response.text}")
+
+                # Update token usage
+                usage = result.get("usage", {})
+                self.token_usage += usage.get("total_tokens", 0)
+                self.requests_this_minute += 1
+                self.last_request_time = datetime.now()
+                return content_of(result)
                 
             except Exception as e:
                 print(f"Error during request: {str(e)}")
@@ -477,19 +479,16 @@ async def main():
     print("Creating schema...")
     kg.create_schema()
     
-    # Load Quran data
-    with open("quran.json", "r", encoding="utf-8") as f:
-        quran_data = json.load(f)
-    
-    # Process each verse
-    for surah in quran_data:
-        surah_num = int(surah["number"])
-        print(f"\nProcessing Surah {surah['name_latin']} ({surah_num})...")
+    # Process each verse (korpus dibaca streaming, satu surah per satu surah)
+    for surah_num, verses in groupby(iter_verses(), key=attrgetter("surah_number")):
+        verses = list(verses)
+        print(f"\nProcessing Surah {verses[0].surah_name_latin} ({surah_num})...")
         
-        for verse_num, arabic_text in surah["text"].items():
-            verse_num = int(verse_num)
-            translation = surah["translations"]["id"]["text"][str(verse_num)]
-            tafsir = surah["tafsir"]["id"]["kemenag"]["text"].get(str(verse_num), "")
+        for verse in verses:
+            verse_num = verse.number
+            arabic_text = verse.text
+            translation = verse.translation
+            tafsir = verse.tafsir
             
             print(f"\nProcessing verse {verse_num}...")
             print(f"Arabic: {arabic_text}")
@@ -1,117 +1,121 @@
 import json
 import re
 import traceback
-import requests
-import os
-from neo4j_graphrag.retrievers import VectorRetriever
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from groq_embedder import Embedder
-from config import driver, INDEX_NAME
-
-# Mapping untuk normalisasi nama surah
-surah_mapping = {
-    'al baqarah': 'Al-Baqarah',
-    'baqarah': 'Al-Baqarah',
-    'al-baqoroh': 'Al-Baqarah',
-    'ali imran': 'Ali Imran',
-    'an nisa': 'An-Nisa',
-    # Tambahkan mapping lainnya sesuai kebutuhan
-}
+from config import (
+    driver, INDEX_NAME, RETRIEVAL_CANDIDATES, RETRIEVAL_TOP_HITS, RETRIEVAL_NEIGHBORS,
+    RETRIEVAL_NEIGHBOR_WEIGHT, RETRIEVAL_LIMIT, FULLTEXT_INDEX_NAME, RRF_K, HYBRID_LEXICAL_GRACE,
+    HYBRID_DECISIVE_RATIO, ARABIC_FULLTEXT_INDEX_NAME, FRAGMENT_MATCH_LIMIT
+)
+from verse_store import get_verse_store
+from verse_query import parse_verse_refs
+from arabic_text import is_arabic, normalize_arabic
+from llm_client import LLMError, content_of, get_llm_client
+from answer_cache import get_answer_cache
+from context_packer import count_tokens, pack_context
+from resources import get_resources
 
 def initialize_groq():
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    GROQ_MODEL = "llama-3.3-70b-versatile"
+    """API key dan model dari resource proses; (None, None) jika Groq tidak dapat dihubungi.
 
-    try:
-        response = requests.get(
-            "https://api.groq.com/openai/v1/models",
-            headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
-            timeout=10
-        )
-        response.raise_for_status()
-        return GROQ_API_KEY, GROQ_MODEL
-    except Exception as e:
-        print(f"❌ Gagal terhubung ke Groq: {str(e)}")
+    Konektivitas sudah dicek saat resource dibuat dan diperbarui berkala di
+    latar, jadi fungsi ini tidak melakukan request sendiri.
+    """
+    resources = get_resources()
+    if not resources.health["llm"]:
         return None, None
+    return resources.groq_api_key, resources.groq_model
 
 def parse_verse_query(query_text):
-    # Regex improved untuk menangkap lebih banyak variasi penulisan
-    pattern = r"(?:ayat|verse|surat|surah)?\s*(?:ke|nomor)?\s*(\d+).*?(surah|surat|dalam)?\s+([a-zA-Z-\s]+?)(?:\s*ayat|\s*$|\.)"
-    match = re.search(pattern, query_text, re.IGNORECASE)
-    
-    if match:
-        verse_number = int(match.group(1))
-        raw_surah = match.group(3).strip().lower()
-        
-        # Normalisasi nama surah
-        surah_name = surah_mapping.get(raw_surah, raw_surah.title())
-        
-        # Validasi angka ayat
-        if not validate_verse_number(surah_name, verse_number):
-            print(f"⚠️ Nomor ayat {verse_number} tidak valid untuk {surah_name}")
-            return None, None
-            
-        return surah_name, verse_number
-    return None, None
-
-def validate_verse_number(surah, number):
-    # Daftar panjang ayat per surah (contoh)
-    max_verses = {
-        'Al-Baqarah': 286,
-        'Ali Imran': 200,
-        'An-Nisa': 176,
-        # Tambahkan data lengkap sesuai kebutuhan
-    }
-    
-    max_num = max_verses.get(surah, 300)  # Default 300 untuk surah tidak terdaftar
-    return 1 <= number <= max_num
+    """Daftar referensi (nomor surah, nomor ayat) dalam query; kosong jika tidak ada"""
+    return parse_verse_refs(query_text)
 
-def get_specific_verse(surah_name, verse_number):
+def get_specific_verses(refs):
+    """Ambil semua ayat yang disebut dalam satu lookup ke VerseStore di memori"""
     try:
-        result = driver.execute_query(
-            """MATCH (s:Surah {name_latin: $surah_name})-[:HAS_AYAT]->(a:Ayat {number: $verse_number})
-            OPTIONAL MATCH (a)-[:HAS_TRANSLATION]->(t:Translation)
-            OPTIONAL MATCH (a)-[:HAS_TAFSIR]->(taf:Tafsir)
-            RETURN s.name_latin as surah, 
-                   a.number as ayat_number, 
-                   a.text as arabic, 
-                   t.text as translation, 
-                   taf.text as tafsir""",
-            {"surah_name": surah_name, "verse_number": verse_number}
-        )
+        records = get_verse_store().get_many(refs)
         
-        if result.records:
-            print(f"✅ Ditemukan ayat {verse_number} dari surah {surah_name}: {result.records}")
-            return result.records
+        if records:
+            print(f"✅ Ditemukan {len(records)} ayat")
+            return records
         else:
-            print(f"⚠️ Tidak ditemukan ayat {verse_number} di surah {surah_name}")
+            print(f"⚠️ Tidak ditemukan ayat untuk referensi {refs}")
             return None
         
     except Exception as e:
         print(f"❌ Error query spesifik: {traceback.format_exc()}")
         return None
 
+def get_specific_verse(surah_name, verse_number):
+    return get_specific_verses([(surah_name, verse_number)])
+
+
+
+# Satu round trip: vector search, ekspansi lewat RELATED_TO (dibaca tanpa arah,
+# agar cocok dengan penyimpanan default dua arah maupun mode symmetric yang
+# menyimpan satu relasi per pasangan), dedup, lalu join Surah
+GRAPH_RETRIEVAL_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $candidates, $query_vector)
+YIELD node, score
+WITH node, score
+ORDER BY score DESC
+LIMIT $top_hits
+CALL {
+    WITH node, score
+    RETURN node AS ayat, score AS blended, null AS via
+    UNION
+    WITH node, score
+    MATCH (node)-[r:RELATED_TO]-(neighbor:Ayat)
+    // Penyimpanan default (dua arah) punya relasi a->b dan b->a: agregasi per tetangga sebelum LIMIT
+    WITH node, score, neighbor, max(r.similarity) AS similarity
+    ORDER BY similarity DESC
+    LIMIT $neighbors
+    RETURN neighbor AS ayat, score * similarity * $neighbor_weight AS blended, node AS via
+}
+WITH ayat, max(blended) AS score, collect(via) AS vias, count(via) < count(*) AS is_hit
+MATCH (s:Surah)-[:HAS_AYAT]->(ayat)
+RETURN ayat.text AS text,
+       ayat.text AS arabic,
+       ayat.translation AS translation,
+       ayat.tafsir AS tafsir,
+       s.name_latin AS surah,
+       s.number AS surah_number,
+       ayat.number AS ayat_number,
+       score,
+       is_hit,
+       CASE WHEN is_hit THEN null
+            ELSE [via IN vias | toString(via.surah_number) + ':' + toString(via.number)][0] END AS related_to
+ORDER BY score DESC
+LIMIT $limit
+"""
 
+def process_vector_query(query_text, neighbors=RETRIEVAL_NEIGHBORS, query_vector=None):
+    """Ambil ayat relevan beserta terjemahan, tafsir, dan tetangga RELATED_TO-nya.
 
-def process_vector_query(query_text):
+    Hit vektor tetap memakai skor similarity aslinya; tetangga mendapat skor
+    gabungan sehingga hanya ikut masuk konteks jika cukup dekat dengan hit.
+    `neighbors=0` mematikan ekspansi graph.
+    """
     try:
-        query_vector = Embedder.embed_text(query_text)
+        if query_vector is None:
+            query_vector = Embedder.embed_text(query_text)
         print(f"🔍 Embedding query dimensi: {len(query_vector)}")  # Tambahkan debugging
 
         result = driver.execute_query(
-            """CALL db.index.vector.queryNodes('ayat_embeddings', 5, $query_vector)
-            YIELD node, score
-            MATCH (s:Surah)-[:HAS_AYAT]->(node)
-            RETURN node.text as text, 
-                   s.name_latin as surah,
-                   node.number as ayat_number, 
-                   score
-            ORDER BY score DESC
-            LIMIT 3""",
-            query_vector=query_vector
+            GRAPH_RETRIEVAL_QUERY,
+            index_name=INDEX_NAME,
+            query_vector=query_vector,
+            candidates=RETRIEVAL_CANDIDATES,
+            top_hits=RETRIEVAL_TOP_HITS,
+            neighbors=neighbors,
+            neighbor_weight=RETRIEVAL_NEIGHBOR_WEIGHT,
+            limit=RETRIEVAL_LIMIT
         )
         
         if result.records:
-            print(f"✅ Hasil pencarian vektor: {result.records}")  # Tambahkan debugging
+            expanded = sum(1 for record in result.records if not record["is_hit"])
+            print(f"✅ Hasil pencarian vektor: {len(result.records)} ayat ({expanded} dari RELATED_TO)")
         else:
             print(f"⚠️ Tidak ada hasil dari vector search.")
         
@@ -122,26 +126,7 @@ def process_vector_query(query_text):
         return []
 
 
-def build_context(records, is_specific=False):
-    context = []
-    for record in records:
-        try:
-            ctx = f"""
-            📖 Surah: {record['surah']}
-            Ayat {record['ayat_number']}:
-            Arab: {record.get('arabic', '')}
-            Terjemahan: {record.get('translation', '')}
-            Tafsir: {record.get('tafsir', '')}
-            """
-            if is_specific:
-                ctx += "\n🔵 [AYAT SPESIFIK YANG DIMINTA]"
-            context.append(ctx)
-        except KeyError as e:
-            print(f"Error format data: {e}")
-    return context
-
-def generate_prompt(context, query_text, is_specific=False):
-    base_prompt = f"""**Instruksi Sistem**
+PROMPT_TEMPLATE = """**Instruksi Sistem**
 Anda adalah AI Asisten ahli tafsir Al-Quran. Berikan jawaban dengan struktur:
 1. Pendahuluan
 2. Ayat Arab + Terjemahan
@@ -150,111 +135,284 @@ Anda adalah AI Asisten ahli tafsir Al-Quran. Berikan jawaban dengan struktur:
 5. Kesimpulan
 
 **Konteks**:
-{"".join(context)}
+{context}
 
 **Pertanyaan**:
-{query_text}"""
+{query}"""
+
+SPECIFIC_NOTE = "\n\n**CATATAN**: User meminta ayat spesifik. Fokuskan jawaban pada ayat tersebut."
+
+def build_context(records, is_specific=False, query_text=""):
+    """Blok konteks per ayat, dipangkas agar seluruh prompt muat di PROMPT_TOKEN_BUDGET"""
+    overhead = count_tokens(PROMPT_TEMPLATE.format(context="", query=query_text))
+    if is_specific:
+        overhead += count_tokens(SPECIFIC_NOTE)
+    return pack_context(records or [], query_text, is_specific, overhead_tokens=overhead)
+
+def generate_prompt(context, query_text, is_specific=False):
+    base_prompt = PROMPT_TEMPLATE.format(context="".join(context), query=query_text)
 
     if is_specific:
-        base_prompt += "\n\n**CATATAN**: User meminta ayat spesifik. Fokuskan jawaban pada ayat tersebut."
+        base_prompt += SPECIFIC_NOTE
 
-    print(f"🔍 Prompt yang dikirim ke Groq API:\n{base_prompt}")  # Debugging
+    print(f"🔍 Prompt ke Groq API: ~{count_tokens(base_prompt)} token, {len(context)} ayat")  # Debugging
     return base_prompt
 
-def get_verse_by_text(text):
-    """Cari ayat berdasarkan teks jika vector search gagal."""
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+def escape_lucene(text):
+    """Escape sintaks Lucene agar input pengguna dicari sebagai kata biasa"""
+    words = LUCENE_SPECIAL.sub(r"\\\1", text).split()
+    # AND/OR/NOT huruf besar adalah operator Lucene
+    return " ".join(word.lower() if word in ("AND", "OR", "NOT") else word for word in words)
+
+LEXICAL_QUERY = """
+CALL db.index.fulltext.queryNodes($index_name, $query, {limit: $limit})
+YIELD node, score
+MATCH (s:Surah)-[:HAS_AYAT]->(node)
+RETURN node.text AS text,
+       node.text AS arabic,
+       node.translation AS translation,
+       node.tafsir AS tafsir,
+       s.name_latin AS surah,
+       s.number AS surah_number,
+       node.number AS ayat_number,
+       score
+ORDER BY score DESC
+"""
+
+def process_lexical_query(query_text, limit=RETRIEVAL_LIMIT, phrase=False, index_name=FULLTEXT_INDEX_NAME):
+    """Cari ayat lewat index full-text (default: text, translation dan tafsir)"""
+    escaped = escape_lucene(query_text)
+    if not escaped:
+        return []
     try:
         result = driver.execute_query(
-            """MATCH (s:Surah)-[:HAS_AYAT]->(a:Ayat)
-            WHERE a.text CONTAINS $text
-            RETURN s.name_latin as surah, a.number as ayat_number, a.text as arabic""",
-            {"text": text}
+            LEXICAL_QUERY,
+            index_name=index_name,
+            query=f'"{escaped}"' if phrase else escaped,
+            limit=limit
         )
-        
-        if result.records:
-            print(f"✅ Ditemukan langsung dengan pencarian teks: {result.records}")
-            return result.records
-        else:
-            print(f"⚠️ Tidak ada hasil dari pencarian teks langsung.")
-            return None
+        return result.records
     except Exception as e:
-        print(f"❌ Error pencarian teks: {traceback.format_exc()}")
+        print(f"❌ Error pencarian full-text: {traceback.format_exc()}")
+        return []
+
+def find_verse_by_fragment(text):
+    """Ayat yang memuat potongan teks Arab: index trigram di memori, lalu index full-text Neo4j"""
+    records = get_verse_store().find_fragment(text, limit=FRAGMENT_MATCH_LIMIT)
+    if records:
+        return records
+    return process_lexical_query(
+        normalize_arabic(text), limit=FRAGMENT_MATCH_LIMIT, phrase=True, index_name=ARABIC_FULLTEXT_INDEX_NAME
+    )
+
+def answer_fragment_query(query_text):
+    """Jawab "ayat apakah ini?" langsung dari index, tanpa memanggil LLM"""
+    if not is_arabic(query_text):
+        return None
+    records = find_verse_by_fragment(query_text)
+    if not records:
         return None
+    print(f"✅ Potongan teks Arab ditemukan di {len(records)} ayat")
+    return format_fragment_answer(records)
 
+def format_fragment_answer(records):
+    lines = ["📖 Potongan ayat tersebut terdapat pada:"]
+    for record in records:
+        lines.append(
+            f"\n**QS {record['surah']} ({record['surah_number']}):{record['ayat_number']}**\n"
+            f"{record['arabic']}\n"
+            f"Terjemahan: {record['translation']}"
+        )
+    return "\n".join(lines)
 
-def process_query(query_text, retriever, GROQ_API_KEY, GROQ_MODEL):
-    try:
-        print(f"\n🔍 Memproses query: '{query_text}'")
-        
-        # Step 1: Cek query spesifik
-        surah_name, verse_number = parse_verse_query(query_text)
-        specific_records = None
+def get_verse_by_text(text):
+    """Cari ayat berdasarkan teks jika vector search gagal."""
+    records = find_verse_by_fragment(text) if is_arabic(text) else process_lexical_query(text, phrase=True)
+    if records:
+        print(f"✅ Ditemukan langsung dengan pencarian teks: {len(records)} ayat")
+        return records
+    else:
+        print(f"⚠️ Tidak ada hasil dari pencarian teks langsung.")
+        return None
+
+def is_decisive(lexical_records):
+    """Hasil leksikal cukup jika skor teratas jauh di atas skor berikutnya"""
+    if not lexical_records:
+        return False
+    if len(lexical_records) == 1:
+        return True
+    return lexical_records[0]["score"] >= HYBRID_DECISIVE_RATIO * lexical_records[1]["score"]
+
+def reciprocal_rank_fusion(*rankings, k=RRF_K, limit=RETRIEVAL_LIMIT):
+    """Gabungkan beberapa daftar hasil: skor = jumlah 1 / (k + peringkat)"""
+    fused = {}
+    for records in rankings:
+        for rank, record in enumerate(records, start=1):
+            key = (record["surah_number"], record["ayat_number"])
+            if key not in fused:
+                fused[key] = {**dict(record), "score": 0.0}
+            fused[key]["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda record: record["score"], reverse=True)[:limit]
+
+def hybrid_retrieve(query_text):
+    """Retrieval leksikal + vektor yang berjalan bersamaan lalu digabung dengan RRF.
+
+    Query full-text diberi waktu singkat (HYBRID_LEXICAL_GRACE) sebelum
+    embedding dimulai; jika hasilnya sudah menentukan, embedding dilewati.
+    Return (record, vektor query), vektor None jika embedding dilewati.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        lexical_future = executor.submit(process_lexical_query, query_text)
+        try:
+            lexical_records = lexical_future.result(timeout=HYBRID_LEXICAL_GRACE)
+            if is_decisive(lexical_records):
+                print(f"⚡ Hasil full-text menentukan, vector search dilewati")
+                return [dict(record) for record in lexical_records], None
+        except FuturesTimeout:
+            pass
         
-        if surah_name and verse_number:
-            print(f"🔎 Deteksi query spesifik - Surah: {surah_name}, Ayat: {verse_number}")
-            specific_records = get_specific_verse(surah_name, verse_number)
-            
-        # Step 2: Hybrid handling
-        if specific_records:
-            context = build_context(specific_records, is_specific=True)
-            is_specific = True
-        else:
-            vector_records = process_vector_query(query_text)
-            context = build_context(vector_records)
-            is_specific = False
+        # Query full-text tetap berjalan di executor selama embedding dan vector search
+        query_vector = Embedder.embed_text(query_text)
+        vector_records = process_vector_query(query_text, query_vector=query_vector)
+        lexical_records = lexical_future.result()
+    
+    print(f"🔀 Fusi RRF: {len(lexical_records)} hasil full-text, {len(vector_records)} hasil vektor")
+    return reciprocal_rank_fusion(vector_records, lexical_records), query_vector
 
-        if not context:
-            return "⚠️ Maaf, tidak menemukan data yang relevan."
 
-        # Step 3: Generate prompt
-        prompt = generate_prompt(context, query_text, is_specific)
+def prepare_prompt(query_text):
+    """Retrieval dan penyusunan prompt: return (prompt, None, vektor query), atau (None, jawaban langsung, ...).
+
+    Vektor query hanya ada di jalur hybrid yang melakukan embedding; dipakai
+    untuk cek cache semantik di sini dan untuk menyimpan jawaban nanti.
+    """
+    # Step 0: Potongan teks Arab dijawab langsung dari index
+    fragment_answer = answer_fragment_query(query_text)
+    if fragment_answer:
+        return None, fragment_answer, None
+    
+    # Step 1: Cek query spesifik
+    verse_refs = parse_verse_query(query_text)
+    specific_records = None
+    
+    if verse_refs:
+        print(f"🔎 Deteksi query spesifik - Ayat: {', '.join(f'{s}:{a}' for s, a in verse_refs)}")
+        specific_records = get_specific_verses(verse_refs)
         
-        # Step 4: Call Groq API
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
-            json={
-                "model": GROQ_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,
-                "max_tokens": 5000
-            }
-        )
+    # Step 2: Hybrid handling
+    query_vector = None
+    if specific_records:
+        context = build_context(specific_records, is_specific=True, query_text=query_text)
+        is_specific = True
+    else:
+        retrieved_records, query_vector = hybrid_retrieve(query_text)
+        if query_vector is not None:
+            cached_answer = get_answer_cache().get_similar(query_vector, tuple(verse_refs))
+            if cached_answer:
+                print(f"⚡ Jawaban diambil dari cache (pertanyaan serupa)")
+                return None, cached_answer, query_vector
+        context = build_context(retrieved_records, query_text=query_text)
+        is_specific = False
+
+    if not context:
+        return None, "⚠️ Maaf, tidak menemukan data yang relevan.", query_vector
 
-        print("Respons API:", response.text)
+    # Step 3: Generate prompt
+    return generate_prompt(context, query_text, is_specific), None, query_vector
+
+def lookup_cached_answer(query_text):
+    """Cek cache jawaban (persis saja, tanpa embedding); return (jawaban atau None, scope referensi ayat)"""
+    scope = tuple(parse_verse_query(query_text))
+    answer = get_answer_cache().get(query_text, scope)
+    if answer:
+        print(f"⚡ Jawaban diambil dari cache")
+    return answer, scope
+
+def store_answer(query_text, scope, answer, query_vector=None):
+    # Hanya jawaban LLM yang berhasil yang disimpan, bukan pesan error/peringatan.
+    # Tanpa vektor, entry hanya bisa kena hit persis.
+    if answer and not answer.startswith(("⚠️", "❌")):
+        get_answer_cache().put(query_text, answer, scope, vector=query_vector)
+
+def process_query(query_text, retriever, GROQ_API_KEY, GROQ_MODEL):
+    try:
+        print(f"\n🔍 Memproses query: '{query_text}'")
         
-        # Periksa status code dan struktur respons
-        if response.status_code != 200:
-            print(f"❌ Gagal memanggil API Groq. Status code: {response.status_code}")
-            print(f"Respons error: {response.text}")
+        cached_answer, scope = lookup_cached_answer(query_text)
+        if cached_answer:
+            return cached_answer
+        
+        prompt, direct_answer, query_vector = prepare_prompt(query_text)
+        if direct_answer:
+            return direct_answer
+        
+        # Step 4: Call Groq API (koneksi keep-alive dipakai ulang)
+        try:
+            response_data = get_llm_client(GROQ_API_KEY).chat(prompt, GROQ_MODEL)
+        except LLMError as e:
+            # Periksa status code
+            print(f"❌ Gagal memanggil API Groq. Status code: {e.status_code}")
+            print(f"Respons error: {e.body}")
             return "⚠️ Maaf, terjadi kesalahan saat memproses permintaan."
 
-        response_data = response.json()
-        
         # Pastikan key 'choices' ada dalam respons
         if "choices" not in response_data:
             print(f"❌ Struktur respons tidak valid: {response_data}")
             return "⚠️ Maaf, terjadi kesalahan dalam format respons."
 
-        return response_data["choices"][0]["message"]["content"]
+        answer = content_of(response_data)
+        store_answer(query_text, scope, answer, query_vector)
+        return answer
 
     except Exception as e:
         print(f"ERROR: {traceback.format_exc()}")
         return "❌ Terjadi kesalahan dalam memproses permintaan."
 
+def process_query_stream(query_text, retriever, GROQ_API_KEY, GROQ_MODEL):
+    """Versi streaming process_query: yield potongan jawaban begitu token tiba.
+
+    Jawaban langsung (potongan ayat, data tidak ditemukan) dan pesan error
+    di-yield sebagai satu potongan dengan format yang sama seperti process_query.
+    """
+    try:
+        print(f"\n🔍 Memproses query (streaming): '{query_text}'")
+        
+        cached_answer, scope = lookup_cached_answer(query_text)
+        if cached_answer:
+            yield cached_answer
+            return
+        
+        prompt, direct_answer, query_vector = prepare_prompt(query_text)
+        if direct_answer:
+            yield direct_answer
+            return
+        
+        try:
+            chunks = []
+            for chunk in get_llm_client(GROQ_API_KEY).stream_chat(prompt, GROQ_MODEL):
+                chunks.append(chunk)
+                yield chunk
+            store_answer(query_text, scope, "".join(chunks), query_vector)  # Disimpan hanya jika stream selesai
+        except LLMError as e:
+            print(f"❌ Gagal memanggil API Groq. Status code: {e.status_code}")
+            print(f"Respons error: {e.body}")
+            yield "⚠️ Maaf, terjadi kesalahan saat memproses permintaan."
+
+    except Exception as e:
+        print(f"ERROR: {traceback.format_exc()}")
+        yield "❌ Terjadi kesalahan dalam memproses permintaan."
+
 def main():
     print("Selamat datang di Chatbot Tafsir Al-Quran")
+    resources = get_resources()
     GROQ_API_KEY, GROQ_MODEL = initialize_groq()
     
     if not GROQ_API_KEY:
         return
 
-    retriever = VectorRetriever(
-        driver=driver,
-        index_name=INDEX_NAME,
-        embedder=Embedder,
-        return_properties=["id", "text", "surah", "ayat_number"]
-    )
+    retriever = resources.retriever
 
     try:
         while True:
@@ -268,7 +426,7 @@ def main():
                 print(answer)
                 
     finally:
-        driver.close()
+        resources.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
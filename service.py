@@ -0,0 +1,335 @@
+"""Layanan HTTP asyncio di atas modul search, untuk banyak pengguna dalam satu proses.
+
+Endpoint (JSON):
+    GET  /health    status Neo4j dan LLM
+    POST /retrieve  {"query": "..."} -> ayat yang relevan, tanpa memanggil LLM
+    POST /answer    {"query": "..."} -> jawaban LLM beserta ayat konteksnya
+
+Embedding dijalankan di thread pool, query Neo4j lewat driver async, dan
+panggilan LLM lewat AsyncClient yang di-pool. Setiap request punya deadline
+(SERVICE_REQUEST_TIMEOUT, bisa diperkecil lewat field "timeout"); jika
+terlewati, respons 504. Untuk uji lokal tanpa Groq:
+
+    python service.py --mock-llm
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from neo4j import AsyncGraphDatabase
+from config import (
+    URI, AUTH, INDEX_NAME, GROQ_BASE_URL, RETRIEVAL_CANDIDATES, RETRIEVAL_TOP_HITS, RETRIEVAL_NEIGHBORS,
+    RETRIEVAL_NEIGHBOR_WEIGHT, RETRIEVAL_LIMIT, FULLTEXT_INDEX_NAME, ARABIC_FULLTEXT_INDEX_NAME,
+    FRAGMENT_MATCH_LIMIT, HYBRID_LEXICAL_GRACE, SERVICE_HOST, SERVICE_PORT, SERVICE_REQUEST_TIMEOUT,
+    SERVICE_EMBED_WORKERS, SERVICE_LLM_CONCURRENCY, SERVICE_MAX_BODY_BYTES
+)
+from groq_embedder import Embedder
+from llm_client import LLMClient, LLMError, content_of
+from arabic_text import is_arabic, normalize_arabic
+from resources import DEFAULT_GROQ_MODEL
+from verse_store import get_verse_store
+from search import (
+    GRAPH_RETRIEVAL_QUERY, LEXICAL_QUERY, escape_lucene, is_decisive, reciprocal_rank_fusion,
+    parse_verse_query, get_specific_verses, build_context, generate_prompt, get_answer_cache,
+    format_fragment_answer
+)
+
+class DeadlineExceeded(Exception):
+    pass
+
+class QueryService:
+    def __init__(self, llm: LLMClient, model: str = DEFAULT_GROQ_MODEL,
+                 embed_workers: int = SERVICE_EMBED_WORKERS, llm_concurrency: int = SERVICE_LLM_CONCURRENCY):
+        self.driver = AsyncGraphDatabase.driver(URI, auth=AUTH)
+        self.llm = llm
+        self.model = model
+        self.verse_store = get_verse_store()
+        self.verse_store.fragment_index()  # Bangun sekarang agar tidak memblok event loop saat request pertama
+        self.answer_cache = get_answer_cache()
+        self.executor = ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix="embed")
+        self.llm_slots = asyncio.Semaphore(llm_concurrency)
+
+    async def close(self):
+        await self.driver.close()
+        await self.llm.aclose()
+        self.executor.shutdown(wait=False)
+
+    async def _in_executor(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def embed(self, text: str) -> List[float]:
+        return await self._in_executor(Embedder.embed_text, text)
+
+    # --- Retrieval ---
+
+    async def vector_query(self, query_text: str, query_vector: Optional[List[float]] = None) -> List[Dict]:
+        if query_vector is None:
+            query_vector = await self.embed(query_text)
+        records, _, _ = await self.driver.execute_query(
+            GRAPH_RETRIEVAL_QUERY,
+            index_name=INDEX_NAME,
+            query_vector=query_vector,
+            candidates=RETRIEVAL_CANDIDATES,
+            top_hits=RETRIEVAL_TOP_HITS,
+            neighbors=RETRIEVAL_NEIGHBORS,
+            neighbor_weight=RETRIEVAL_NEIGHBOR_WEIGHT,
+            limit=RETRIEVAL_LIMIT
+        )
+        return [record.data() for record in records]
+
+    async def lexical_query(self, query_text: str, limit: int = RETRIEVAL_LIMIT, phrase: bool = False,
+                            index_name: str = FULLTEXT_INDEX_NAME) -> List[Dict]:
+        escaped = escape_lucene(query_text)
+        if not escaped:
+            return []
+        try:
+            records, _, _ = await self.driver.execute_query(
+                LEXICAL_QUERY,
+                index_name=index_name,
+                query=f'"{escaped}"' if phrase else escaped,
+                limit=limit
+            )
+        except Exception:
+            # Sama seperti search.process_lexical_query: index full-text yang belum dibuat
+            # tidak menggagalkan request, retrieval lanjut dengan vector search saja
+            print(f"❌ Error pencarian full-text: {traceback.format_exc()}")
+            return []
+        return [record.data() for record in records]
+
+    async def hybrid_retrieve(self, query_text: str) -> Tuple[List[Dict], Optional[List[float]]]:
+        """Sama seperti search.hybrid_retrieve, tetapi dengan coroutine"""
+        lexical_task = asyncio.ensure_future(self.lexical_query(query_text))
+        try:
+            lexical_records = await asyncio.wait_for(asyncio.shield(lexical_task), HYBRID_LEXICAL_GRACE)
+            if is_decisive(lexical_records):
+                return lexical_records, None
+        except asyncio.TimeoutError:
+            pass
+        try:
+            query_vector = await self.embed(query_text)
+            lexical_records, vector_records = await asyncio.gather(
+                lexical_task, self.vector_query(query_text, query_vector)
+            )
+        finally:
+            lexical_task.cancel()  # Tidak berpengaruh jika sudah selesai
+        return reciprocal_rank_fusion(vector_records, lexical_records), query_vector
+
+    async def retrieve(self, query_text: str) -> Tuple[str, List[Dict], Optional[List[float]]]:
+        """(sumber, record, vektor query): sumber 'fragment', 'specific', atau 'hybrid'.
+
+        Vektor query hanya ada jika jalur hybrid melakukan embedding.
+        """
+        if is_arabic(query_text):
+            records = self.verse_store.find_fragment(query_text, limit=FRAGMENT_MATCH_LIMIT)
+            if not records:
+                records = await self.lexical_query(
+                    normalize_arabic(query_text), limit=FRAGMENT_MATCH_LIMIT, phrase=True,
+                    index_name=ARABIC_FULLTEXT_INDEX_NAME
+                )
+            if records:
+                return "fragment", records, None
+        verse_refs = parse_verse_query(query_text)
+        if verse_refs:
+            records = get_specific_verses(verse_refs)
+            if records:
+                return "specific", records, None
+        records, query_vector = await self.hybrid_retrieve(query_text)
+        return "hybrid", records, query_vector
+
+    # --- Answer ---
+
+    async def answer(self, query_text: str) -> Dict:
+        scope = tuple(parse_verse_query(query_text))
+        # Cek persis dulu; cek semantik menunggu vektor dari jalur hybrid
+        cached = await self._in_executor(self.answer_cache.get, query_text, scope)
+        if cached:
+            return {"answer": cached, "cached": True, "source": "cache", "records": []}
+
+        source, records, query_vector = await self.retrieve(query_text)
+        if query_vector is not None:
+            cached = await self._in_executor(self.answer_cache.get_similar, query_vector, scope)
+            if cached:
+                return {"answer": cached, "cached": True, "source": "cache", "records": []}
+        if source == "fragment":
+            # Pertanyaan "ayat apakah ini?" dijawab langsung dari index, tanpa LLM
+            return {"answer": format_fragment_answer(records), "cached": False, "source": source, "records": records}
+        if not records:
+            return {"answer": "⚠️ Maaf, tidak menemukan data yang relevan.", "cached": False,
+                    "source": source, "records": []}
+
+        is_specific = source == "specific"
+        context = build_context(records, is_specific=is_specific, query_text=query_text)
+        prompt = generate_prompt(context, query_text, is_specific)
+        async with self.llm_slots:
+            response_data = await self.llm.achat(prompt, self.model)
+        answer = content_of(response_data)
+        await self._in_executor(
+            lambda: self.answer_cache.put(query_text, answer, scope, vector=query_vector)
+        )
+        return {"answer": answer, "cached": False, "source": source, "records": records}
+
+    async def health(self) -> Dict:
+        health = {"neo4j": False, "llm": False}
+        try:
+            await self.driver.verify_connectivity()
+            health["neo4j"] = True
+        except Exception as e:
+            health["neo4j_error"] = str(e)
+        try:
+            await self.llm.alist_models()
+            health["llm"] = True
+        except Exception as e:
+            health["llm_error"] = str(e)
+        return health
+
+# --- HTTP ---
+
+def record_json(record: Dict) -> Dict:
+    """Field record yang dikirim ke klien (tanpa embedding)"""
+    return {
+        key: record.get(key)
+        for key in ("surah", "surah_number", "ayat_number", "arabic", "translation", "tafsir", "score", "related_to")
+        if record.get(key) is not None
+    }
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Request line tidak valid")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    content_length = headers.get("content-length") or "0"
+    # isdigit menolak nilai negatif, desimal, dan teks sebelum sampai ke int()/readexactly
+    if not (content_length.isascii() and content_length.isdigit()):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Header Content-Length tidak valid")
+    length = int(content_length)
+    if length > SERVICE_MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body terlalu besar")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], headers, body
+
+def write_response(writer: asyncio.StreamWriter, status: HTTPStatus, body: Dict, keep_alive: bool):
+    data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + data)
+
+def parse_query_body(body: bytes) -> Tuple[str, float]:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body harus JSON")
+    if not isinstance(payload, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body harus objek JSON")
+    query_text = payload.get("query", "")
+    if not isinstance(query_text, str) or not query_text.strip():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Field 'query' wajib diisi")
+    timeout = payload.get("timeout")
+    if timeout is None:
+        return query_text.strip(), SERVICE_REQUEST_TIMEOUT
+    # bool adalah subclass int di Python, jadi ditolak secara eksplisit
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout < float("inf"):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Field 'timeout' harus angka detik lebih dari 0")
+    return query_text.strip(), min(float(timeout), SERVICE_REQUEST_TIMEOUT)
+
+async def dispatch(service: QueryService, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Dict]:
+    if method == "GET" and path == "/health":
+        health = await asyncio.wait_for(service.health(), SERVICE_REQUEST_TIMEOUT)
+        status = HTTPStatus.OK if health["neo4j"] and health["llm"] else HTTPStatus.SERVICE_UNAVAILABLE
+        return status, health
+    if method == "POST" and path in ("/retrieve", "/answer"):
+        query_text, timeout = parse_query_body(body)
+        started = time.perf_counter()
+        try:
+            if path == "/retrieve":
+                source, records, _ = await asyncio.wait_for(service.retrieve(query_text), timeout)
+                result = {"source": source, "records": [record_json(record) for record in records]}
+            else:
+                result = await asyncio.wait_for(service.answer(query_text), timeout)
+                result["records"] = [record_json(record) for record in result["records"]]
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Deadline {timeout:.1f} detik terlewati") from None
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return HTTPStatus.OK, result
+    raise HTTPError(HTTPStatus.NOT_FOUND, f"Endpoint tidak dikenal: {method} {path}")
+
+async def handle_connection(service: QueryService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+                status, result = await dispatch(service, method, path, body)
+            except HTTPError as e:
+                status, result = e.status, {"error": str(e)}
+            except DeadlineExceeded as e:
+                status, result = HTTPStatus.GATEWAY_TIMEOUT, {"error": str(e)}
+            except LLMError as e:
+                status, result = HTTPStatus.BAD_GATEWAY, {"error": str(e)}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                print(f"ERROR: {traceback.format_exc()}")
+                status, result = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+            write_response(writer, status, result, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+async def serve(host: str, port: int, llm_base_url: str, model: str):
+    service = QueryService(LLMClient(api_key=os.getenv("GROQ_API_KEY"), base_url=llm_base_url), model=model)
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    print(f"🚀 Layanan query berjalan di http://{host}:{port} (LLM: {llm_base_url})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Layanan HTTP asyncio untuk retrieval dan jawaban tafsir")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--model", default=DEFAULT_GROQ_MODEL)
+    parser.add_argument("--llm-base-url", default=GROQ_BASE_URL)
+    parser.add_argument("--mock-llm", action="store_true", help="Jalankan mock_llm_server di proses ini sebagai LLM")
+    args = parser.parse_args()
+
+    llm_base_url = args.llm_base_url
+    if args.mock_llm:
+        from mock_llm_server import start_mock_server
+        _, llm_base_url = start_mock_server()
+
+    try:
+        asyncio.run(serve(args.host, args.port, llm_base_url, args.model))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,112 @@
+"""Graph similarity ayat (hasil KNN) dalam format compressed sparse row (CSR).
+
+Disimpan sebagai direktori berisi file .npy sehingga bisa di-memory-map:
+- surah_numbers, ayah_numbers: kunci ayat per baris, urut (surah, ayat)
+- indptr: tetangga baris i ada di indices/similarities[indptr[i]:indptr[i + 1]]
+- indices: baris tetangga, similarities: skor kosinusnya (urut menurun)
+
+Dipakai untuk ekspansi tetangga di dalam proses (tanpa round trip ke Neo4j)
+dan analitik graph offline.
+"""
+import os
+import numpy as np
+
+ARRAYS = ("surah_numbers", "ayah_numbers", "indptr", "indices", "similarities")
+
+def _key_codes(surah_numbers, ayah_numbers):
+    # Satu bilangan per kunci agar bisa dicari dengan binary search
+    return surah_numbers.astype(np.int64) * 100000 + ayah_numbers.astype(np.int64)
+
+class SimilarityGraph:
+    def __init__(self, surah_numbers, ayah_numbers, indptr, indices, similarities):
+        self.surah_numbers = surah_numbers
+        self.ayah_numbers = ayah_numbers
+        self.indptr = indptr
+        self.indices = indices
+        self.similarities = similarities
+        self._codes = _key_codes(surah_numbers, ayah_numbers)
+
+    @classmethod
+    def from_neighbor_lists(cls, surah_numbers, ayah_numbers, lists):
+        """lists: {baris: {baris tetangga: similarity}}; baris tanpa entry dianggap tanpa tetangga"""
+        counts = np.zeros(len(surah_numbers), dtype=np.int64)
+        for row, neighbors in lists.items():
+            counts[row] = len(neighbors)
+        indptr = np.zeros(len(surah_numbers) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        similarities = np.empty(indptr[-1], dtype=np.float32)
+        for row, neighbors in lists.items():
+            ordered = sorted(neighbors.items(), key=lambda item: -item[1])
+            indices[indptr[row]:indptr[row + 1]] = [neighbor for neighbor, _ in ordered]
+            similarities[indptr[row]:indptr[row + 1]] = [score for _, score in ordered]
+        
+        return cls(
+            np.asarray(surah_numbers, dtype=np.int32),
+            np.asarray(ayah_numbers, dtype=np.int32),
+            indptr, indices, similarities
+        )
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Muat graph; dengan mmap=True array dibaca langsung dari file sesuai kebutuhan"""
+        mmap_mode = "r" if mmap else None
+        return cls(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS))
+
+    def __len__(self):
+        return len(self.surah_numbers)
+
+    def row_of(self, surah_number, ayah_number):
+        """Baris untuk kunci ayat, atau None jika tidak ada"""
+        code = int(surah_number) * 100000 + int(ayah_number)
+        row = int(np.searchsorted(self._codes, code))
+        if row < len(self._codes) and self._codes[row] == code:
+            return row
+        return None
+
+    def key(self, row):
+        return int(self.surah_numbers[row]), int(self.ayah_numbers[row])
+
+    def neighbors(self, surah_number, ayah_number, limit=None):
+        """Tetangga ayat: list (nomor surah, nomor ayat, similarity), urut menurun"""
+        row = self.row_of(surah_number, ayah_number)
+        if row is None:
+            return []
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        if limit is not None:
+            end = min(end, start + limit)
+        return [
+            (*self.key(neighbor), float(score))
+            for neighbor, score in zip(self.indices[start:end], self.similarities[start:end])
+        ]
+
+    def expand(self, keys, limit_per_key=3):
+        """Tetangga dari beberapa ayat sekaligus, tanpa duplikat dan tanpa ayat asal.
+
+        Return dict {(surah, ayat): similarity tertinggi}.
+        """
+        seeds = {(int(surah), int(ayah)) for surah, ayah in keys}
+        expanded = {}
+        for surah, ayah in seeds:
+            for neighbor_surah, neighbor_ayah, score in self.neighbors(surah, ayah, limit_per_key):
+                key = (neighbor_surah, neighbor_ayah)
+                if key not in seeds and score > expanded.get(key, -np.inf):
+                    expanded[key] = score
+        return expanded
+
+    def to_neighbor_lists(self):
+        """Kebalikan from_neighbor_lists, dengan kunci ayat: {kunci: {kunci tetangga: similarity}}"""
+        lists = {}
+        for row in range(len(self)):
+            start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+            lists[self.key(row)] = {
+                self.key(neighbor): float(score)
+                for neighbor, score in zip(self.indices[start:end], self.similarities[start:end])
+            }
+        return lists
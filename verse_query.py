@@ -0,0 +1,274 @@
+"""Parser referensi ayat dalam pertanyaan pengguna.
+
+Mengenali nama 114 surah beserta variasi transliterasinya ("Al-Baqarah",
+"al baqoroh", "albaqarah"), nomor surah ("QS 2 ayat 255", "surat ke 2
+ayat 255", "2:255"), lalu nomor ayat tunggal, rentang ("Al-Baqarah 1-5",
+"ayat 1 sampai 5") dan daftar ("ayat 1, 3 dan 5").
+Nama surah dicocokkan dengan trie token yang dibangun sekali dari data surah.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import MAX_VERSE_REFS
+from corpus import SurahInfo
+from verse_store import get_verse_store
+
+ARTICLES = {"al", "el", "an", "ar", "as", "asy", "ash", "at", "ad", "adz", "az", "ats", "ath"}
+
+# Nama lain yang tidak bisa diturunkan dari aturan transliterasi
+EXTRA_ALIASES = {
+    "fatiha": 1, "ummul kitab": 1, "ali imron": 3, "bani israil": 17, "isra": 17,
+    "taubah": 9, "baraah": 9, "tawbah": 9, "thaha": 20, "mukminun": 23, "ankabut": 29,
+    "yaasin": 36, "yaseen": 36, "shad": 38, "ghafir": 40, "mumin": 40, "fushshilat": 41,
+    "jatsiyah": 45, "jathiyah": 45, "dzariyat": 51, "dhariyat": 51, "mujadilah": 58,
+    "taghabun": 64, "muddatstsir": 74, "muddaththir": 74, "dahr": 76, "ghasyiyah": 88,
+    "ghashiyah": 88, "insyirah": 94, "alam nasyrah": 94, "takatsur": 102, "takathur": 102,
+    "kahfi": 18, "kautsar": 108, "kawthar": 108, "masad": 111, "tabbat": 111,
+}
+
+# Kata yang boleh ada di antara nama surah dan nomor ayat
+FILLER_WORDS = {
+    "ayat", "ayah", "ayatnya", "verse", "verses", "ke", "nomor", "no", "dari", "dalam",
+    "di", "surah", "surat", "qs", "of", "in", "the", "pada", "yaitu",
+}
+# Kata yang bisa diikuti nomor surah ("QS 2", "surat ke 2")
+SURAH_WORDS = {"qs", "surah", "surat"}
+ORDINAL_WORDS = {"ke", "nomor", "no"}
+# Kata yang menandai nomor ayat; wajib ada jika nomor ditulis sebelum nama surah
+VERSE_WORDS = {"ayat", "ayah", "ayatnya", "verse", "verses"}
+RANGE_WORDS = {"sampai", "hingga", "to", "until", "sd"}
+LIST_WORDS = {"dan", "and", "serta"}
+
+TOKEN_PATTERN = re.compile(r"\d+|[^\W\d_]+|[-–—]|[,;&]|:")
+
+def canonical(word: str) -> str:
+    """Bentuk kanonik transliterasi: variasi ejaan yang lazim dipetakan ke satu bentuk"""
+    if not word.isascii():
+        return word  # Nama Arab dicocokkan apa adanya
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if word in ARTICLES:
+        return "al"
+    for source, target in (
+        ("sy", "s"), ("sh", "s"), ("ts", "s"), ("dz", "z"), ("dh", "z"), ("zh", "z"),
+        ("kh", "h"), ("gh", "g"), ("th", "t"), ("aw", "au"), ("ay", "ai"), ("q", "k"),
+        ("ee", "i"), ("oo", "u"), ("o", "a"), ("e", "a"),
+    ):
+        word = word.replace(source, target)
+    word = re.sub(r"(.)\1+", r"\1", word)  # Huruf ganda: muzzammil -> muzamil
+    return re.sub(r"([aiu])h$", r"\1", word)  # Ta marbutah: fatihah -> fatiha
+
+FILLER_WORDS_CANONICAL = {canonical(word) for word in FILLER_WORDS}
+SURAH_WORDS_CANONICAL = {canonical(word) for word in SURAH_WORDS}
+ORDINAL_WORDS_CANONICAL = {canonical(word) for word in ORDINAL_WORDS}
+VERSE_WORDS_CANONICAL = {canonical(word) for word in VERSE_WORDS}
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """Token (jenis, nilai): 'num', 'word' (sudah kanonik), 'dash', 'comma', 'colon'"""
+    text = re.sub(r"['`’‘]", "", text)
+    text = re.sub(r"\bs\s*/\s*d\b", " - ", text, flags=re.IGNORECASE)
+    text = re.sub(r"(?<=[^\W\d_])[-–—](?=[^\W\d_])", " ", text)  # Al-Baqarah -> Al Baqarah
+    tokens = []
+    for raw in TOKEN_PATTERN.findall(text):
+        if raw.isdigit():
+            tokens.append(("num", raw))
+        elif raw in "-–—":
+            tokens.append(("dash", raw))
+        elif raw in ",;&":
+            tokens.append(("comma", raw))
+        elif raw == ":":
+            tokens.append(("colon", raw))
+        else:
+            lowered = raw.lower()
+            if lowered in RANGE_WORDS:
+                tokens.append(("dash", lowered))
+            elif lowered in LIST_WORDS:
+                tokens.append(("comma", lowered))
+            else:
+                tokens.append(("word", canonical(raw)))
+    return tokens
+
+def _alias_token_lists(name: str) -> List[List[str]]:
+    """Variasi token alias satu nama: dengan/tanpa kata sandang, dengan/tanpa spasi"""
+    words = [word for word in re.split(r"[\s\-_]+", re.sub(r"['`’‘]", "", name)) if word]
+    if not words:
+        return []
+    variants = [[canonical(word) for word in words]]
+    if len(words) > 1:
+        variants.append([canonical("".join(words))])
+    if words[0].lower() in ARTICLES and len(words) > 1:
+        rest = words[1:]
+        variants.append([canonical(word) for word in rest])
+        variants.append([canonical("".join(rest))])
+        variants.append([canonical("al" + "".join(rest))])
+    return variants
+
+class SurahAliasIndex:
+    """Trie token kanonik -> nomor surah"""
+
+    _END = ""
+
+    def __init__(self, surahs: Iterable[SurahInfo], extra_aliases: Dict[str, int] = EXTRA_ALIASES):
+        self._root: Dict = {}
+        for surah in surahs:
+            for tokens in _alias_token_lists(surah.name_latin):
+                self._add(tokens, surah.number)
+            self._add([surah.name], surah.number)
+        for alias, number in extra_aliases.items():
+            for tokens in _alias_token_lists(alias):
+                self._add(tokens, number)
+
+    def _add(self, tokens: List[str], number: int):
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(self._END, number)
+
+    def match(self, words: List[str], start: int) -> Optional[Tuple[int, int]]:
+        """Cocokkan alias terpanjang mulai words[start]; return (nomor surah, indeks akhir) atau None"""
+        node = self._root
+        best = None
+        for position in range(start, len(words)):
+            node = node.get(words[position])
+            if node is None:
+                break
+            if self._END in node:
+                best = (node[self._END], position + 1)
+        return best
+
+    def lookup(self, name: str) -> Optional[int]:
+        words = [value for kind, value in tokenize(name) if kind == "word"]
+        matched = self.match(words, 0) if words else None
+        return matched[0] if matched and matched[1] == len(words) else None
+
+@lru_cache(maxsize=None)
+def get_alias_index() -> SurahAliasIndex:
+    return SurahAliasIndex(get_verse_store().surahs())
+
+def _number(value: str) -> int:
+    # Angka sangat panjang tidak mungkin nomor ayat; jangan biarkan int() bekerja keras
+    return int(value) if len(value) <= 6 else 10 ** 6
+
+def _parse_spec(tokens, position) -> Tuple[List[Tuple[int, int]], int]:
+    """Baca daftar/rentang nomor ayat mulai tokens[position]; return ((awal, akhir) per rentang, posisi setelahnya).
+
+    Rentang tidak diekspansi di sini: nilainya berasal dari input pengguna dan
+    baru aman diekspansi setelah dipotong ke jumlah ayat surah.
+    """
+    spans = []
+    while position < len(tokens) and tokens[position][0] == "num":
+        first = _number(tokens[position][1])
+        position += 1
+        last = first
+        if position + 1 < len(tokens) and tokens[position][0] == "dash" and tokens[position + 1][0] == "num":
+            last = _number(tokens[position + 1][1])
+            position += 2
+        spans.append((first, max(first, last)))
+        
+        # Lanjut hanya jika ada pemisah daftar diikuti nomor (boleh diselingi kata "ayat")
+        lookahead = position
+        if lookahead < len(tokens) and tokens[lookahead][0] == "comma":
+            lookahead += 1
+            while lookahead < len(tokens) and tokens[lookahead] in (("word", "ayat"), ("word", "ayah")):
+                lookahead += 1
+            if lookahead < len(tokens) and tokens[lookahead][0] == "num":
+                position = lookahead
+                continue
+        break
+    return spans, position
+
+def _is_filler(token) -> bool:
+    return token[0] == "colon" or (token[0] == "word" and token[1] in FILLER_WORDS_CANONICAL)
+
+def parse_verse_refs(text: str, alias_index: Optional[SurahAliasIndex] = None) -> List[Tuple[int, int]]:
+    """Semua referensi (nomor surah, nomor ayat) dalam teks, urut dan tanpa duplikat.
+
+    Nomor ayat di luar jumlah ayat surahnya dibuang; hasil dibatasi MAX_VERSE_REFS.
+    """
+    alias_index = alias_index or get_alias_index()
+    store = get_verse_store()
+    tokens = tokenize(text)
+    
+    # Cari penyebutan surah: nama (trie), "QS 2" / "surat ke 2", atau "2:255"
+    mentions = []  # (nomor surah, posisi awal, posisi akhir)
+    surah_positions = set()  # Posisi token angka yang dipakai sebagai nomor surah, bukan nomor ayat
+    position = 0
+    while position < len(tokens):
+        kind, value = tokens[position]
+        if kind == "word" and value in SURAH_WORDS_CANONICAL:
+            number_at = position + 1
+            while number_at < len(tokens) and (
+                tokens[number_at][0] == "dash" or
+                (tokens[number_at][0] == "word" and tokens[number_at][1] in ORDINAL_WORDS_CANONICAL)
+            ):
+                number_at += 1
+            # "QS 2:255" ditangani cabang N:M di bawah
+            if number_at < len(tokens) and tokens[number_at][0] == "num" and not (
+                number_at + 1 < len(tokens) and tokens[number_at + 1][0] == "colon"
+            ):
+                mentions.append((_number(tokens[number_at][1]), position, number_at + 1))
+                surah_positions.add(number_at)
+                position = number_at + 1
+                continue
+        # "surah"/"surat" tidak memulai nama (bentuk kanoniknya sama dengan "Syura")
+        if kind == "word" and value not in FILLER_WORDS_CANONICAL:
+            words = []
+            end = position
+            while end < len(tokens) and tokens[end][0] == "word":
+                words.append(tokens[end][1])
+                end += 1
+            matched = alias_index.match(words, 0)
+            if matched:
+                mentions.append((matched[0], position, position + matched[1]))
+                position += matched[1]
+                continue
+        elif kind == "num" and position + 2 < len(tokens) and tokens[position + 1][0] == "colon" \
+                and tokens[position + 2][0] == "num":
+            mentions.append((_number(value), position, position + 2))
+            surah_positions.add(position)
+            position += 2
+            continue
+        position += 1
+    
+    refs = []
+    used = set()  # Posisi awal spesifikasi ayat yang sudah dipakai
+    for surah_number, start, end in mentions:
+        # Nomor ayat sesudah nama surah ("Al-Baqarah ayat 1-5")...
+        after = end
+        while after < len(tokens) and _is_filler(tokens[after]):
+            after += 1
+        spans = []
+        if after < len(tokens) and tokens[after][0] == "num" and after not in used | surah_positions:
+            spans, _ = _parse_spec(tokens, after)
+            used.add(after)
+        else:
+            # ... atau sebelumnya, hanya jika ditandai kata "ayat" ("ayat 255 surah Al-Baqarah"),
+            # supaya "juz 30 surah An-Naba" tidak dibaca sebagai ayat 30
+            before = start - 1
+            marked = False
+            while before >= 0 and _is_filler(tokens[before]):
+                marked = marked or tokens[before][1] in VERSE_WORDS_CANONICAL
+                before -= 1
+            spec_start = before
+            while spec_start > 0 and tokens[spec_start - 1][0] in ("num", "dash", "comma"):
+                spec_start -= 1
+            while spec_start <= before and tokens[spec_start][0] != "num":
+                spec_start += 1
+            lead = spec_start - 1
+            while lead >= 0 and tokens[lead][0] == "word" and tokens[lead][1] in ORDINAL_WORDS_CANONICAL:
+                lead -= 1
+            marked = marked or (lead >= 0 and tokens[lead][0] == "word" and tokens[lead][1] in VERSE_WORDS_CANONICAL)
+            if before >= 0 and tokens[before][0] == "num" and marked and spec_start not in used | surah_positions:
+                spans, _ = _parse_spec(tokens, spec_start)
+                used.add(spec_start)
+        
+        max_verses = store.number_of_ayah(surah_number) or 0
+        for first, last in spans:
+            if first < 1 or last > max_verses:
+                spec = str(first) if first == last else f"{first}-{last}"
+                print(f"⚠️ Nomor ayat {spec} tidak valid untuk surah {surah_number}")
+            # Potong ke jumlah ayat surah dan MAX_VERSE_REFS sebelum diekspansi
+            first = max(first, 1)
+            last = min(last, max_verses, first + MAX_VERSE_REFS - 1)
+            refs.extend((surah_number, number) for number in range(first, last + 1))
+    
+    return list(dict.fromkeys(refs))[:MAX_VERSE_REFS]
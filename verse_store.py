@@ -0,0 +1,174 @@
+"""Penyimpanan ayat read-only di memori proses.
+
+Semua 6.236 ayat dimuat sekali (dari korpus atau dari graph Neo4j) sehingga
+pencarian ayat spesifik berdasarkan (surah, ayat) atau nama surah cukup
+lookup dict, tanpa round trip ke database.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from config import VERSE_STORE_SOURCE
+from corpus import SurahInfo, Verse, iter_surah_info, iter_verses
+from arabic_text import arabic_skeleton, trigrams
+
+# Awalan kata sandang pada nama latin surah (Al-, An-, Ash-, ...)
+ARTICLE_PATTERN = re.compile(r"^(al|an|ar|as|asy|ash|at|ad|adz|az|ath)\s+")
+
+def normalize_surah_name(name: str) -> str:
+    """Huruf kecil, tanpa apostrof, tanda hubung jadi spasi: "Ali 'Imran" -> "ali imran" """
+    name = re.sub(r"['`’‘]", "", name.lower())
+    name = re.sub(r"[-_\s]+", " ", name)
+    name = re.sub(r"^(surah|surat|qs)\.?\s+", "", name.strip())
+    return name.strip()
+
+def surah_aliases(surah: SurahInfo) -> List[str]:
+    normalized = normalize_surah_name(surah.name_latin)
+    aliases = [normalized, normalized.replace(" ", ""), ARTICLE_PATTERN.sub("", normalized), surah.name]
+    return [alias for alias in aliases if alias]
+
+class VerseStore:
+    def __init__(self, surahs: Iterable[SurahInfo], verses: Iterable[Verse]):
+        self._surahs: Dict[int, SurahInfo] = {surah.number: surah for surah in surahs}
+        self._verses: Dict[Tuple[int, int], Verse] = {(verse.surah_number, verse.number): verse for verse in verses}
+        self._aliases: Dict[str, int] = {}
+        self._fragment_index = None  # Dibangun saat pencarian potongan pertama
+        for surah in self._surahs.values():
+            for alias in surah_aliases(surah):
+                self._aliases.setdefault(alias, surah.number)
+
+    @classmethod
+    def from_corpus(cls, path: Optional[str] = None) -> "VerseStore":
+        return cls(iter_surah_info(path), iter_verses(path))
+
+    @classmethod
+    def from_graph(cls, driver) -> "VerseStore":
+        with driver.session() as session:
+            surahs = [
+                SurahInfo(id="", number=record["number"], name=record["name"],
+                          name_latin=record["name_latin"], number_of_ayah=record["number_of_ayah"])
+                for record in session.run(
+                    """MATCH (s:Surah)
+                    RETURN s.number AS number, s.name AS name, s.name_latin AS name_latin,
+                           s.number_of_ayah AS number_of_ayah"""
+                )
+            ]
+            by_number = {surah.number: surah for surah in surahs}
+            verses = [
+                Verse(
+                    surah_id="",
+                    surah_number=record["surah_number"],
+                    surah_name=by_number[record["surah_number"]].name,
+                    surah_name_latin=by_number[record["surah_number"]].name_latin,
+                    number=record["number"],
+                    text=record["text"],
+                    translation=record["translation"] or "",
+                    tafsir=record["tafsir"] or ""
+                )
+                for record in session.run(
+                    """MATCH (s:Surah)-[:HAS_AYAT]->(a:Ayat)
+                    RETURN s.number AS surah_number, a.number AS number, a.text AS text,
+                           a.translation AS translation, a.tafsir AS tafsir"""
+                )
+            ]
+        return cls(surahs, verses)
+
+    def __len__(self) -> int:
+        return len(self._verses)
+
+    def surahs(self) -> List[SurahInfo]:
+        return [self._surahs[number] for number in sorted(self._surahs)]
+
+    def surah_number(self, surah: Union[int, str]) -> Optional[int]:
+        """Nomor surah dari nomor atau alias nama surah mana pun"""
+        if isinstance(surah, int) or str(surah).isdigit():
+            number = int(surah)
+            return number if number in self._surahs else None
+        if surah in self._aliases:
+            return self._aliases[surah]
+        name = normalize_surah_name(surah)
+        return self._aliases.get(name) or self._aliases.get(name.replace(" ", ""))
+
+    def surah(self, surah: Union[int, str]) -> Optional[SurahInfo]:
+        number = self.surah_number(surah)
+        return self._surahs.get(number) if number else None
+
+    def number_of_ayah(self, surah: Union[int, str]) -> Optional[int]:
+        info = self.surah(surah)
+        return info.number_of_ayah if info else None
+
+    def get(self, surah: Union[int, str], ayah_number: int) -> Optional[Dict]:
+        """Record ayat dalam format yang dipakai search.build_context, atau None"""
+        number = self.surah_number(surah)
+        verse = self._verses.get((number, int(ayah_number))) if number else None
+        return self.to_record(verse) if verse else None
+
+    def get_many(self, refs: Iterable[Tuple[Union[int, str], int]]) -> List[Dict]:
+        """Ambil banyak ayat sekaligus; referensi yang tidak ada dilewati"""
+        records = (self.get(surah, ayah_number) for surah, ayah_number in refs)
+        return [record for record in records if record]
+
+    def fragment_index(self):
+        """Index trigram atas kerangka teks Arab (arabic_skeleton) setiap ayat, dibangun sekali"""
+        if self._fragment_index is None:
+            self._build_fragment_index()
+        return self._fragment_index
+
+    def _build_fragment_index(self):
+        keys = sorted(self._verses)
+        skeletons = [arabic_skeleton(self._verses[key].text) for key in keys]
+        postings: Dict[str, Set[int]] = {}
+        for position, skeleton in enumerate(skeletons):
+            for gram in trigrams(skeleton):
+                postings.setdefault(gram, set()).add(position)
+        self._fragment_index = (keys, skeletons, postings)
+
+    def find_fragment(self, fragment: str, limit: int = 5) -> List[Dict]:
+        """Ayat yang memuat potongan teks Arab, dengan atau tanpa harakat.
+
+        Kandidat diambil dari irisan posting trigram (mulai dari yang paling
+        jarang), lalu diverifikasi dengan pencocokan substring. Record diberi
+        `score` = porsi ayat yang tertutup potongan, ayat terpendek di atas.
+        """
+        query = arabic_skeleton(fragment)
+        if len(query) < 3:
+            return []
+        keys, skeletons, postings = self.fragment_index()
+        
+        candidates = None
+        for gram in sorted(trigrams(query), key=lambda gram: len(postings.get(gram, ()))):
+            posting = postings.get(gram)
+            if not posting:
+                return []
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return []
+        
+        matches = sorted(
+            (position for position in candidates if query in skeletons[position]),
+            key=lambda position: (len(skeletons[position]), keys[position])
+        )[:limit]
+        records = []
+        for position in matches:
+            record = self.to_record(self._verses[keys[position]])
+            record["score"] = len(query) / len(skeletons[position])
+            records.append(record)
+        return records
+
+    @staticmethod
+    def to_record(verse: Verse) -> Dict:
+        return {
+            "surah": verse.surah_name_latin,
+            "surah_number": verse.surah_number,
+            "ayat_number": verse.number,
+            "arabic": verse.text,
+            "translation": verse.translation,
+            "tafsir": verse.tafsir
+        }
+
+@lru_cache(maxsize=None)
+def get_verse_store() -> VerseStore:
+    """VerseStore milik proses, dimuat sekali saat pertama kali dipakai"""
+    if VERSE_STORE_SOURCE == "graph":
+        from config import driver
+        return VerseStore.from_graph(driver)
+    return VerseStore.from_corpus()